@@ -1,12 +1,20 @@
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import weaviate
 from weaviate.auth import AuthApiKey
 from weaviate.classes.config import Configure
 from weaviate.classes.generate import GenerativeConfig
+from weaviate.classes.query import Filter, MetadataQuery
+from starlette.routing import Match
 
 from dotenv import load_dotenv
 import os
@@ -15,10 +23,10 @@ import logging
 
 
 try:
-    from weaviate.agents.query import QueryAgent
+    from weaviate.agents.query import AsyncQueryAgent
     from weaviate.agents.classes import QueryAgentCollectionConfig
 except ImportError:
-    from weaviate_agents.query import QueryAgent
+    from weaviate_agents.query import AsyncQueryAgent
     from weaviate_agents.classes import QueryAgentCollectionConfig
 
 logging.basicConfig(level=logging.INFO)
@@ -26,7 +34,25 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-app = FastAPI(title="Weaviate Enterprise Search API", version="1.0.0")
+from request_timing import TimedRoute, phase, server_timing_header, start_request
+from weaviate_connection import WeaviateConnection
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client per worker, opened on the first request and shared until shutdown.
+    # Schema and tenants are provisioned by connect_and_collection.py, never here.
+    app.state.weaviate = WeaviateConnection()
+    await app.state.weaviate.start()
+    try:
+        yield
+    finally:
+        await app.state.weaviate.close()
+        await query_cache.close()
+        await answer_streamer.close()
+
+app = FastAPI(title="Weaviate Enterprise Search API", version="1.0.0", lifespan=lifespan)
+# Splits each request's Server-Timing into endpoint and validation/serialization time
+app.router.route_class = TimedRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,28 +60,119 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-Profile-File"],
 )
 
-WEAVIATE_URL = os.getenv('WCD_URL')
-WEAVIATE_API_KEY = os.getenv('WCD_API_KEY')
-ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_APIKEY')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+MAX_PAGE_SIZE = 1000
+SEARCH_TYPES = ("keyword", "vector", "hybrid", "generative")
+MAX_AGENT_SOURCES = 10
+SOURCE_PROPERTIES = ["content", "file_name", "created_date", "chunk_index", "file_id"]
+EXPORT_PAGE_SIZE = 500  # objects per round trip while exporting
+MAX_BATCH_SIZE = 100
+SEARCH_BATCH_CONCURRENCY = int(os.getenv('SEARCH_BATCH_CONCURRENCY', 16))  # searches in flight per batch
+FEDERATED_TENANT_TIMEOUT = float(os.getenv('FEDERATED_TENANT_TIMEOUT', 5.0))  # seconds per tenant
+GZIP_MIN_SIZE = int(os.getenv('GZIP_MIN_SIZE', 1000))  # bytes; smaller bodies are sent as is
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 5))  # 9 costs far more CPU for a few percent smaller bodies
+
+# For clients sending Accept-Encoding: gzip; Server-Sent Events are never compressed
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+from config import DEFAULT_TENANTS
+from data_models import (DOCUMENT_PROPERTIES, DUPLICATE_OVERFETCH, collapse_duplicates, document_from_object,
+                         fuse_results, missing_canonicals, shape_document)
+from metrics import (FALLBACKS, REQUEST_LATENCY, REQUESTS_IN_FLIGHT, RESPONSE_BYTES, SEARCH_LATENCY,
+                     SEARCH_RESULTS, register_stats, render_metrics, track)
+import profiler
+from profiler import PROFILE_ALLOW_HEADER
+from query_cache import create_query_cache
+from semantic_cache import create_semantic_cache
+from serialization import negotiated_response
+from single_flight import SingleFlight
+from streaming import SSE_HEADERS, AnthropicStreamer, sse_event
+from tenant_versions import TenantCountCache, create_tenant_versions
+
+# Counts and cached results are dropped when data_to_weaviate.py bumps a tenant's version
+tenant_versions = create_tenant_versions()
+tenant_counts = TenantCountCache(tenant_versions)
+query_cache = create_query_cache(tenant_versions)
+semantic_cache = create_semantic_cache(tenant_versions)
+single_flight = SingleFlight()
+
+register_stats("query_cache", query_cache.stats)
+register_stats("semantic_cache", semantic_cache.stats)
+register_stats("single_flight", single_flight.stats)
 
-from connect_and_collection import weaviate_client
+def route_template(scope) -> str:
+    """Path template of the matching route, so metric labels stay low-cardinality"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    endpoint = route_template(request.scope)
+    REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+    phases = start_request()
+    force_profile = PROFILE_ALLOW_HEADER and request.headers.get("x-profile") == "1"
+    sampler = profiler.maybe_start(force_profile)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        length = response.headers.get("content-length")
+        if length:
+            RESPONSE_BYTES.labels(endpoint).observe(int(length))
+        # Streaming responses are timed to their first byte; later phases are not in the header
+        response.headers["Server-Timing"] = server_timing_header(phases, time.perf_counter() - start)
+        if sampler:
+            path = await finish_profile(sampler, request, endpoint, time.perf_counter() - start, force_profile)
+            sampler = None
+            if path:
+                response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        if sampler:
+            await finish_profile(sampler, request, endpoint, elapsed, force_profile)
+        REQUEST_LATENCY.labels(endpoint, request.method, str(status)).observe(elapsed)
+        REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+
+async def finish_profile(sampler, request: Request, endpoint: str, elapsed: float, force: bool) -> Optional[str]:
+    path = await asyncio.to_thread(profiler.finish, sampler, f"{request.method} {endpoint}", elapsed, force)
+    if path:
+        logger.info(f"Profile of {request.method} {request.url.path} ({elapsed * 1000:.0f} ms) written to {path}")
+    return path
+
+async def get_weaviate():
+    with phase("connect"):
+        return await app.state.weaviate.get()
+
+GENERATIVE_MODEL = "claude-3-opus-20240229"
+GENERATIVE_MAX_TOKENS = 256
+GENERATIVE_TEMPERATURE = 0.7
 
 def get_anthropic_generative_config():
     return GenerativeConfig.anthropic(
-        model="claude-3-opus-20240229",
-        max_tokens=256,
-        temperature=0.7,
+        model=GENERATIVE_MODEL,
+        max_tokens=GENERATIVE_MAX_TOKENS,
+        temperature=GENERATIVE_TEMPERATURE,
     )
 
+answer_streamer = AnthropicStreamer(GENERATIVE_MODEL, GENERATIVE_MAX_TOKENS, GENERATIVE_TEMPERATURE)
+
 class SearchRequest(BaseModel):
     query: str
     tenant: str
     search_type: str = "hybrid"
     alpha: float = 0.5
     limit: int = 10
+    # Compact list views: only these properties, trimmed content or highlighted snippets
+    return_properties: Optional[List[str]] = None
+    max_content_length: Optional[int] = Field(None, gt=0)
+    snippets: bool = False
 
 class AgentRequest(BaseModel):
     query: str
@@ -63,10 +180,12 @@ class AgentRequest(BaseModel):
 
 class DocumentResponse(BaseModel):
     id: str
-    content: str
-    file_name: str
-    chunk_index: int
-    created_date: str
+    content: Optional[str] = None
+    file_id: Optional[str] = None
+    file_name: Optional[str] = None
+    chunk_index: Optional[int] = None
+    created_date: Optional[str] = None
+    canonical_id: Optional[str] = None
     score: Optional[float] = None
 
 class SearchResponse(BaseModel):
@@ -75,6 +194,41 @@ class SearchResponse(BaseModel):
     search_type: str
     query: str
 
+class FederatedSearchRequest(BaseModel):
+    query: str
+    tenants: Optional[List[str]] = None  # None searches every tenant
+    search_type: str = "hybrid"
+    alpha: float = 0.5
+    limit: int = 10
+    fusion: str = "rrf"  # "rrf" or "score"
+    tenant_timeout: float = Field(FEDERATED_TENANT_TIMEOUT, gt=0, le=FEDERATED_TENANT_TIMEOUT)
+    return_properties: Optional[List[str]] = None
+    max_content_length: Optional[int] = Field(None, gt=0)
+    snippets: bool = False
+
+class FederatedDocument(DocumentResponse):
+    tenant: str
+
+class FederatedSearchResponse(BaseModel):
+    documents: List[FederatedDocument]
+    total_count: int
+    search_type: str
+    query: str
+    tenants: List[str]
+    timed_out: List[str] = []
+    failed: Dict[str, str] = {}
+
+class BatchSearchRequest(BaseModel):
+    requests: List[SearchRequest]
+
+class BatchSearchItem(BaseModel):
+    result: Optional[SearchResponse] = None
+    error: Optional[str] = None
+    status_code: int = 200
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchItem]
+
 class TenantInfo(BaseModel):
     name: str
     document_count: int
@@ -83,80 +237,257 @@ class TenantInfo(BaseModel):
 async def root():
     return {"message": "Weaviate Enterprise Search API"}
 
+async def count_tenant(docs, tenant_name: str) -> int:
+    """Server-side count: no objects are transferred"""
+    version = tenant_counts.versions.get(tenant_name)
+    with track("weaviate_aggregate"):
+        result = await docs.with_tenant(tenant_name).aggregate.over_all(total_count=True)
+    tenant_counts.set(tenant_name, result.total_count, version)
+    logger.info(f"Found {result.total_count} documents for tenant {tenant_name}")
+    return result.total_count
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/cache/stats", response_model=Dict)
+async def cache_stats():
+    return {**query_cache.stats(), "semantic": semantic_cache.stats(), "single_flight": single_flight.stats()}
+
 @app.get("/tenants", response_model=List[TenantInfo])
 async def get_tenants():
-    client = None
     try:
-        client = weaviate_client
-        docs = client.collections.get("Documents")
-        tenants = ["HR", "Finance", "Customer-Service"]
-        
-        tenant_info = []
-        for tenant_name in tenants:
-            try:
-                tenant_collection = docs.with_tenant(tenant_name)
-                result = tenant_collection.query.fetch_objects(limit=1000)
-                tenant_info.append(TenantInfo(
-                    name=tenant_name,
-                    document_count=len(result.objects)
-                ))
-                logger.info(f"Found {len(result.objects)} documents for tenant {tenant_name}")
-            except Exception as e:
-                logger.warning(f"Error fetching documents for tenant {tenant_name}: {e}")
-                tenant_info.append(TenantInfo(
-                    name=tenant_name,
-                    document_count=0
-                ))
-        
-        return tenant_info
+        counts = {name: tenant_counts.get(name) for name in DEFAULT_TENANTS}
+        missing = [name for name, count in counts.items() if count is None]
+        if missing:
+            client = await get_weaviate()
+            docs = client.collections.get("Documents")
+            results = await asyncio.gather(
+                *(count_tenant(docs, name) for name in missing), return_exceptions=True
+            )
+            for tenant_name, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Error counting documents for tenant {tenant_name}: {result}")
+                    result = 0
+                counts[tenant_name] = result
+
+        return [TenantInfo(name=name, document_count=count) for name, count in counts.items()]
     except Exception as e:
         logger.error(f"Error in get_tenants: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if client:
-            try:
-                client.close()
-            except:
-                pass
 
 @app.get("/documents/{tenant}", response_model=List[DocumentResponse])
-async def get_documents(tenant: str, limit: int = 50):
-    client = None
+async def get_documents(tenant: str, response: Response, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+                        after: Optional[str] = None):
+    """One page in UUID order; pass the X-Next-Cursor header back as `after` for the next page"""
     try:
-        client = weaviate_client
+        client = await get_weaviate()
         docs = client.collections.get("Documents")
         tenant_collection = docs.with_tenant(tenant)
         
-        result = tenant_collection.query.fetch_objects(limit=limit)
+        with track("weaviate_query"):
+            result = await tenant_collection.query.fetch_objects(
+                limit=limit,
+                after=after,
+                return_properties=DOCUMENT_PROPERTIES
+            )
         
-        documents = []
-        for i, obj in enumerate(result.objects):
-            properties = obj.properties or {}
-            documents.append(DocumentResponse(
-                id=str(obj.uuid),
-                content=properties.get("content", "No content available"),
-                file_name=f"Document_{i+1}",
-                chunk_index=i,
-                created_date="2024-01-01",
-            ))
+        documents = [DocumentResponse(**document_from_object(obj)) for obj in result.objects]
+        if len(documents) == limit:
+            response.headers["X-Next-Cursor"] = documents[-1].id
         
         logger.info(f"Retrieved {len(documents)} documents for tenant {tenant}")
         return documents
     except Exception as e:
         logger.error(f"Error in get_documents for tenant {tenant}: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching documents: {str(e)}")
-    finally:
-        if client:
+
+@app.get("/documents/{tenant}/export")
+async def export_documents(tenant: str, after: Optional[str] = None):
+    """Every chunk of a tenant as NDJSON, paged by cursor so server memory stays constant"""
+    client = await get_weaviate()
+    tenant_collection = client.collections.get("Documents").with_tenant(tenant)
+
+    async def lines():
+        cursor, exported = after, 0
+        try:
+            while True:
+                result = await tenant_collection.query.fetch_objects(
+                    limit=EXPORT_PAGE_SIZE,
+                    after=cursor,
+                    return_properties=DOCUMENT_PROPERTIES
+                )
+                for obj in result.objects:
+                    yield json.dumps(document_from_object(obj)) + "\n"
+                exported += len(result.objects)
+                if len(result.objects) < EXPORT_PAGE_SIZE:
+                    break
+                cursor = str(result.objects[-1].uuid)
+            logger.info(f"Exported {exported} documents for tenant {tenant}")
+        except Exception as e:
+            # Headers are already sent: end with an error line the client can detect and resume from
+            logger.error(f"Error exporting tenant {tenant} after {exported} documents: {e}")
+            yield json.dumps({"error": str(e), "after": cursor}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/documents/{tenant}/{object_id}", response_model=DocumentResponse)
+async def get_document(tenant: str, object_id: str):
+    """One full chunk, for clients that listed compact results"""
+    try:
+        client = await get_weaviate()
+        tenant_collection = client.collections.get("Documents").with_tenant(tenant)
+        obj = await tenant_collection.query.fetch_object_by_id(object_id, return_properties=DOCUMENT_PROPERTIES)
+    except Exception as e:
+        logger.error(f"Error in get_document {tenant}/{object_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching document: {str(e)}")
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return DocumentResponse(**document_from_object(obj))
+
+# Search results stay plain dicts and are encoded once (JSON, or MessagePack on Accept);
+# the response models only document the schema. Properties left out by
+# return_properties are omitted, not sent as null.
+@app.post("/search", response_model=SearchResponse, response_model_exclude_unset=True)
+async def search_documents(request: SearchRequest, http_request: Request):
+    return negotiated_response(http_request, await cached_search(request))
+
+@app.post("/search/batch", response_model=BatchSearchResponse, response_model_exclude_unset=True)
+async def search_batch(batch: BatchSearchRequest, http_request: Request):
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} searches per batch")
+
+    # Identical sub-requests run once and share their result
+    unique = {}
+    for request in batch.requests:
+        unique.setdefault(json.dumps(request.model_dump(), sort_keys=True), request)
+
+    slots = asyncio.Semaphore(SEARCH_BATCH_CONCURRENCY)
+
+    async def run(request: SearchRequest) -> Dict[str, Any]:
+        async with slots:
             try:
-                client.close()
-            except:
-                pass
+                return {"result": await cached_search(request), "status_code": 200}
+            except HTTPException as e:
+                return {"error": str(e.detail), "status_code": e.status_code}
+            except Exception as e:
+                logger.error(f"Error in batch search item '{request.query}': {e}")
+                return {"error": str(e), "status_code": 500}
+
+    items = await asyncio.gather(*(run(request) for request in unique.values()))
+    by_key = dict(zip(unique, items))
+    logger.info(f"Batch search: {len(batch.requests)} searches, {len(unique)} unique")
+    return negotiated_response(http_request, {"results": [
+        by_key[json.dumps(request.model_dump(), sort_keys=True)] for request in batch.requests
+    ]})
+
+@app.post("/search/federated", response_model=FederatedSearchResponse, response_model_exclude_unset=True)
+async def search_federated(request: FederatedSearchRequest, http_request: Request):
+    if request.search_type not in ("keyword", "vector", "hybrid"):
+        raise HTTPException(status_code=400, detail="Federated search supports keyword, vector and hybrid")
+    if request.fusion not in ("rrf", "score"):
+        raise HTTPException(status_code=400, detail="fusion must be 'rrf' or 'score'")
+    tenants = request.tenants or DEFAULT_TENANTS
+
+    async def search_tenant(tenant: str) -> Dict[str, Any]:
+        return await asyncio.wait_for(cached_search(SearchRequest(
+            query=request.query,
+            tenant=tenant,
+            search_type=request.search_type,
+            alpha=request.alpha,
+            limit=request.limit,
+            return_properties=request.return_properties,
+            max_content_length=request.max_content_length,
+            snippets=request.snippets,
+        )), timeout=request.tenant_timeout)
+
+    # A slow tenant is dropped after its timeout instead of holding up the others
+    responses = await asyncio.gather(*(search_tenant(tenant) for tenant in tenants), return_exceptions=True)
+    results, timed_out, failed = {}, [], {}
+    for tenant, response in zip(tenants, responses):
+        if isinstance(response, asyncio.TimeoutError):
+            timed_out.append(tenant)
+        elif isinstance(response, HTTPException):
+            failed[tenant] = str(response.detail)
+        elif isinstance(response, Exception):
+            failed[tenant] = str(response)
+        else:
+            results[tenant] = response["documents"]
+    if timed_out or failed:
+        logger.warning(f"Federated search '{request.query}': timed out {timed_out}, failed {list(failed)}")
+
+    documents = fuse_results(results, request.fusion, request.limit)
+    return negotiated_response(http_request, {
+        "documents": documents,
+        "total_count": len(documents),
+        "search_type": request.search_type,
+        "query": request.query,
+        "tenants": list(tenants),
+        "timed_out": timed_out,
+        "failed": failed,
+    })
+
+async def cached_search(request: SearchRequest) -> Dict[str, Any]:
+    """Search through the exact and semantic caches; the result has SearchResponse's shape"""
+    # Validated before labelling, and tenants outside the known set share one label, so
+    # arbitrary request values cannot create new metric series
+    if request.search_type not in SEARCH_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid search type")
+    tenant_label = request.tenant if request.tenant in DEFAULT_TENANTS else "other"
+    with SEARCH_LATENCY.labels(request.search_type, tenant_label).time():
+        response = await lookup_or_search(request)
+    SEARCH_RESULTS.labels(response["search_type"]).observe(len(response["documents"]))
+    return response
+
+async def lookup_or_search(request: SearchRequest) -> Dict[str, Any]:
+    # Keyed on every parameter plus the tenant's version, so a re-index misses
+    cache_key = query_cache.key("search", request.tenant, request.model_dump())
+    with phase("cache"):
+        cached = await query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Generated answers are also reused for paraphrases of an earlier question
+    vector = None
+    semantic_kind = "generative"  # not keyed on limit: it only changes how much context the answer had
+    if request.search_type == "generative":
+        with phase("embed"):
+            vector = await semantic_cache.embed(request.query)
+        match = semantic_cache.get(semantic_kind, request.tenant, vector)
+        if match:
+            matched_query, value, similarity = match
+            logger.info(f"Semantic cache hit for '{request.query}' (~'{matched_query}', {similarity:.3f})")
+            return {**value, "query": request.query}
+
+    async def search_and_store() -> Dict[str, Any]:
+        response = await execute_search(request)
+        if not any(document["id"] == "no_response" for document in response["documents"]):
+            await query_cache.set(cache_key, response)
+            if request.search_type == "generative":
+                semantic_cache.set(semantic_kind, request.tenant, vector, request.query, response)
+        return response
+
+    # Identical searches already in flight share that call instead of querying again
+    return await coalesce(cache_key, search_and_store)
+
+async def coalesce(key: str, fn):
+    try:
+        return await single_flight.do(key, fn)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out waiting for the upstream call")
+
+async def execute_search(request: SearchRequest) -> Dict[str, Any]:
+    unknown = set(request.return_properties or []) - set(DOCUMENT_PROPERTIES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown properties {sorted(unknown)}, expected {DOCUMENT_PROPERTIES}")
+    # canonical_id is always fetched so near-duplicates still collapse
+    properties = DOCUMENT_PROPERTIES
+    if request.return_properties is not None:
+        properties = list(dict.fromkeys(request.return_properties + ["canonical_id"]))
 
-@app.post("/search", response_model=SearchResponse)
-async def search_documents(request: SearchRequest):
-    client = None
     try:
-        client = weaviate_client
+        client = await get_weaviate()
         docs = client.collections.get("Documents")
         tenant_collection = docs.with_tenant(request.tenant)
         
@@ -164,159 +495,221 @@ async def search_documents(request: SearchRequest):
         result = None
         
         if request.search_type == "keyword":
-            result = tenant_collection.query.bm25(
-                query=request.query,
-                limit=request.limit
-            )
+            with track("weaviate_query"):
+                result = await tenant_collection.query.bm25(
+                    query=request.query,
+                    limit=request.limit * DUPLICATE_OVERFETCH,
+                    return_properties=properties,
+                    return_metadata=MetadataQuery(score=True)
+                )
             
         elif request.search_type == "vector":
-            result = tenant_collection.query.near_text(
-                query=request.query,
-                limit=request.limit
-            )
+            with track("weaviate_query"):
+                result = await tenant_collection.query.near_text(
+                    query=request.query,
+                    limit=request.limit * DUPLICATE_OVERFETCH,
+                    return_properties=properties,
+                    return_metadata=MetadataQuery(distance=True)
+                )
             
         elif request.search_type == "hybrid":
-            result = tenant_collection.query.hybrid(
-                query=request.query,
-                alpha=request.alpha,
-                limit=request.limit
-            )
+            with track("weaviate_query"):
+                result = await tenant_collection.query.hybrid(
+                    query=request.query,
+                    alpha=request.alpha,
+                    limit=request.limit * DUPLICATE_OVERFETCH,
+                    return_properties=properties,
+                    return_metadata=MetadataQuery(score=True)
+                )
             
         elif request.search_type == "generative":
             gen_config = get_anthropic_generative_config()
             
-            result = tenant_collection.generate.near_text(
-                query=request.query,
-                limit=request.limit,
-                single_prompt=f"Based on the following context, answer the question: {request.query}",
-                grouped_task="Summarize the key points from the search results",
-                generative_provider=gen_config
-            )
+            with track("llm_generation"):
+                result = await tenant_collection.generate.near_text(
+                    query=request.query,
+                    limit=request.limit,
+                    single_prompt=f"Based on the following context, answer the question: {request.query}",
+                    grouped_task="Summarize the key points from the search results",
+                    generative_provider=gen_config
+                )
             
             if hasattr(result, 'generated') and result.generated:
-                generated_text = result.generated
-                documents = [DocumentResponse(
-                    id="generated_response",
-                    content=generated_text,
-                    file_name="AI Generated Response",
-                    chunk_index=0,
-                    created_date=datetime.now().strftime("%Y-%m-%d"),
-                    score=1.0
-                )]
+                documents = [{
+                    "id": "generated_response",
+                    "content": result.generated,
+                    "file_name": "AI Generated Response",
+                    "chunk_index": 0,
+                    "created_date": datetime.now().strftime("%Y-%m-%d"),
+                    "score": 1.0,
+                }]
             else:
-                documents = [DocumentResponse(
-                    id="no_response",
-                    content="No response generated",
-                    file_name="No Response",
-                    chunk_index=0,
-                    created_date=datetime.now().strftime("%Y-%m-%d"),
-                    score=0.0
-                )]
+                FALLBACKS.labels("generative_no_response").inc()
+                documents = [{
+                    "id": "no_response",
+                    "content": "No response generated",
+                    "file_name": "No Response",
+                    "chunk_index": 0,
+                    "created_date": datetime.now().strftime("%Y-%m-%d"),
+                    "score": 0.0,
+                }]
             
             logger.info(f"Generative search completed: Generated response only")
-            return SearchResponse(
-                documents=documents,
-                total_count=len(documents),
-                search_type=request.search_type,
-                query=request.query
-            )
+            return {
+                "documents": documents,
+                "total_count": len(documents),
+                "search_type": request.search_type,
+                "query": request.query,
+            }
             
         else:
             raise HTTPException(status_code=400, detail="Invalid search type")
         
-        for i, obj in enumerate(result.objects):
-            properties = obj.properties or {}
-            documents.append(DocumentResponse(
-                id=str(obj.uuid),
-                content=properties.get("content", "No content available"),
-                file_name=f"Search_Result_{i+1}",
-                chunk_index=i,
-                created_date="2024-01-01",
-                score=getattr(obj, 'score', None)
-            ))
+        hits = [document_from_object(obj) for obj in result.objects]
+        canonicals = await fetch_canonicals(tenant_collection, hits, request.limit, properties)
+        documents = [
+            shape_document(document, request.return_properties, request.query,
+                           request.max_content_length, request.snippets)
+            for document in collapse_duplicates(hits, request.limit, canonicals)
+        ]
         
         logger.info(f"Search completed: {len(documents)} results for query '{request.query}'")
-        return SearchResponse(
-            documents=documents,
-            total_count=len(documents),
-            search_type=request.search_type,
-            query=request.query
-        )
+        return {
+            "documents": documents,
+            "total_count": len(documents),
+            "search_type": request.search_type,
+            "query": request.query,
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in search_documents: {e}")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
-    finally:
-        if client:
-            try:
-                client.close()
-            except:
-                pass
+
+async def fetch_canonicals(tenant_collection, hits: List[Dict[str, Any]], limit: int,
+                           properties: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Canonical chunks of the top hits that did not match the query themselves, by id"""
+    missing = missing_canonicals(hits, limit)
+    if not missing:
+        return {}
+    with track("weaviate_query"):
+        result = await tenant_collection.query.fetch_objects(
+            filters=Filter.by_id().contains_any(missing),
+            limit=len(missing),
+            return_properties=properties
+        )
+    return {str(obj.uuid): document_from_object(obj) for obj in result.objects}
 
 @app.post("/query-agent", response_model=Dict)
 async def query_agent(request: AgentRequest):
-    client = None
-    try:
-        client = weaviate_client
+    with phase("embed"):
+        vector = await semantic_cache.embed(request.query)
+    match = semantic_cache.get("query-agent", request.tenant, vector)
+    if match:
+        matched_query, value, similarity = match
+        logger.info(f"Semantic cache hit for '{request.query}' (~'{matched_query}', {similarity:.3f})")
+        return {**value, "query": request.query, "cached_query": matched_query, "similarity": similarity}
 
-        collection_name = "Documents"
+    async def run_and_store() -> Dict:
+        result = await run_query_agent(request)
+        semantic_cache.set("query-agent", request.tenant, vector, request.query, result)
+        return result
 
-        agent = QueryAgent(client=client)
+    return await coalesce(query_cache.key("query-agent", request.tenant, {"query": request.query}), run_and_store)
 
-        
-        cfg = QueryAgentCollectionConfig(
-            name=collection_name,
-            tenant=request.tenant,
-            view_properties=["content", "file_name", "created_date"]
-        )
+def agent_collection_config(tenant: str):
+    return QueryAgentCollectionConfig(
+        name="Documents",
+        tenant=tenant,
+        view_properties=DOCUMENT_PROPERTIES
+    )
 
-        response = agent.run(
-            request.query,
-            collections=[cfg]
-        )
+async def fetch_sources(client, collection: str, tenant: str, object_ids: List[str]) -> Dict[str, Any]:
+    """One ID-filtered query for all sources in a collection: {object id: properties}"""
+    result = await client.collections.get(collection).with_tenant(tenant).query.fetch_objects(
+        filters=Filter.by_id().contains_any(object_ids),
+        limit=len(object_ids),
+        return_properties=SOURCE_PROPERTIES
+    )
+    return {str(obj.uuid).lower(): obj.properties or {} for obj in result.objects}
 
-        # Hydrate sources using existing props only
-        hydrated_sources = []
-        try:
-            for src in response.sources[:10]:
-                # QueryAgent can touch multiple collections; re-scope per source
-                coll = client.collections.get(src.collection).with_tenant(request.tenant)
-                obj = coll.query.fetch_object_by_id(src.object_id)
-                props = obj.properties or {}
-                hydrated_sources.append({
-                    "collection": src.collection,
-                    "id": src.object_id,
-                    "content": (props.get("content") or "")[:500],
-                    "file_name": props.get("file_name"),
-                    "created_date": props.get("created_date"),
-                    "chunk_index": props.get("chunk_index"),
-                    "file_id": props.get("file_id"),
-                })
-        except Exception as hydrate_err:
-            logger.warning(f"Source hydration failed: {hydrate_err}")
-
-        result = {
-            "query": request.query,
-            "tenant": request.tenant,
-            "answer": response.final_answer,
-            "collections": getattr(response, "collection_names", None),
-            "usage": {
-                "requests": getattr(getattr(response, "usage", None), "requests", None),
-                "request_tokens": getattr(getattr(response, "usage", None), "request_tokens", None),
-                "response_tokens": getattr(getattr(response, "usage", None), "response_tokens", None),
-                "total_tokens": getattr(getattr(response, "usage", None), "total_tokens", None),
-                "total_time_sec": getattr(response, "total_time", None),
-            },
-            "searches": [
-                {"collection": q.collection, "queries": q.queries}
-                for group in getattr(response, "searches", []) for q in group
-            ],
-            "aggregations": [
-                {"collection": a.collection, "search_query": a.search_query}
-                for group in getattr(response, "aggregations", []) for a in group
-            ],
-            "sources": hydrated_sources,
-        }
+async def hydrate_sources(client, tenant: str, sources) -> List[Dict]:
+    """Source details in agent order, fetched with one round trip per collection, all collections at once"""
+    by_collection = {}
+    for src in sources:
+        by_collection.setdefault(src.collection, []).append(src.object_id)
+    fetched = await asyncio.gather(
+        *(fetch_sources(client, collection, tenant, ids) for collection, ids in by_collection.items()),
+        return_exceptions=True
+    )
+
+    properties = {}
+    for collection, found in zip(by_collection, fetched):
+        if isinstance(found, Exception):
+            logger.warning(f"Source hydration failed for {collection}: {found}")
+            continue
+        properties.update({(collection, object_id): props for object_id, props in found.items()})
+
+    hydrated_sources = []
+    for src in sources:
+        props = properties.get((src.collection, str(src.object_id).lower()))
+        if props is None:
+            continue
+        hydrated_sources.append({
+            "collection": src.collection,
+            "id": src.object_id,
+            "content": (props.get("content") or "")[:500],
+            "file_name": props.get("file_name"),
+            "created_date": props.get("created_date"),
+            "chunk_index": props.get("chunk_index"),
+            "file_id": props.get("file_id"),
+        })
+    return hydrated_sources
+
+async def agent_result(client, request: AgentRequest, response) -> Dict:
+    """Response payload for a finished agent run, with its sources hydrated"""
+    with track("source_hydration"):
+        hydrated_sources = await hydrate_sources(client, request.tenant, response.sources[:MAX_AGENT_SOURCES])
+
+    result = {
+        "query": request.query,
+        "tenant": request.tenant,
+        "answer": response.final_answer,
+        "collections": getattr(response, "collection_names", None),
+        "usage": {
+            "requests": getattr(getattr(response, "usage", None), "requests", None),
+            "request_tokens": getattr(getattr(response, "usage", None), "request_tokens", None),
+            "response_tokens": getattr(getattr(response, "usage", None), "response_tokens", None),
+            "total_tokens": getattr(getattr(response, "usage", None), "total_tokens", None),
+            "total_time_sec": getattr(response, "total_time", None),
+        },
+        "searches": [
+            {"collection": q.collection, "queries": q.queries}
+            for group in getattr(response, "searches", []) for q in group
+        ],
+        "aggregations": [
+            {"collection": a.collection, "search_query": a.search_query}
+            for group in getattr(response, "aggregations", []) for a in group
+        ],
+        "sources": hydrated_sources,
+    }
+    return result
+
+async def run_query_agent(request: AgentRequest) -> Dict:
+    try:
+        client = await get_weaviate()
+
+        agent = AsyncQueryAgent(client=client)
+        cfg = agent_collection_config(request.tenant)
+
+        with track("agent_run"):
+            response = await agent.run(
+                request.query,
+                collections=[cfg]
+            )
+
+        result = await agent_result(client, request, response)
 
         logger.info(f"Query Agent completed for: {request.query} (tenant={request.tenant})")
         return result
@@ -324,14 +717,114 @@ async def query_agent(request: AgentRequest):
     except Exception as e:
         logger.error(f"Error in query_agent: {e}")
         raise HTTPException(status_code=500, detail=f"Query Agent error: {str(e)}")
-    finally:
-        if client:
+
+def build_answer_prompt(query: str, documents: List[Dict[str, Any]]) -> str:
+    context = "\n\n".join(f"[{i}] {document.get('file_name')}: {document.get('content')}"
+                           for i, document in enumerate(documents, start=1))
+    return f"Based on the following context, answer the question: {query}\n\nContext:\n{context}"
+
+async def stream_answer(request: SearchRequest, documents: List[Dict[str, Any]]):
+    """Answer tokens as the model produces them; without an Anthropic key, Weaviate
+    generates over the already retrieved ids and the answer arrives in one piece"""
+    if answer_streamer.available:
+        with track("llm_generation"):
+            async for token in answer_streamer.stream(build_answer_prompt(request.query, documents)):
+                yield token
+        return
+
+    client = await get_weaviate()
+    tenant_collection = client.collections.get("Documents").with_tenant(request.tenant)
+    with track("llm_generation"):
+        result = await tenant_collection.generate.fetch_objects(
+            filters=Filter.by_id().contains_any([document["id"] for document in documents]),
+            limit=len(documents),
+            grouped_task=f"Based on the following context, answer the question: {request.query}",
+            generative_provider=get_anthropic_generative_config()
+        )
+    yield result.generated or ""
+
+@app.post("/search/stream")
+async def search_stream(request: SearchRequest):
+    """Server-Sent Events: `sources` as soon as retrieval is done, then `token`
+    events for generative search, then `done` (or `error`)"""
+    if request.search_type not in SEARCH_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid search type")
+
+    async def events():
+        started = time.perf_counter()
+        try:
+            if request.search_type != "generative":
+                yield sse_event("sources", await cached_search(request))
+                yield sse_event("done", {"elapsed_sec": time.perf_counter() - started})
+                return
+
+            # The prompt gets whole chunks; projection, trimming and snippets only shape the sources event
+            retrieval = request.model_copy(update={"search_type": "vector", "return_properties": None,
+                                                   "max_content_length": None, "snippets": False})
+            sources = await cached_search(retrieval)
+            yield sse_event("sources", {**sources, "documents": [
+                shape_document(dict(document), request.return_properties, request.query,
+                               request.max_content_length, request.snippets)
+                for document in sources["documents"]
+            ]})
+
+            if sources["documents"]:
+                async for token in stream_answer(request, sources["documents"]):
+                    yield sse_event("token", {"delta": token})
+            yield sse_event("done", {"elapsed_sec": time.perf_counter() - started})
+        except Exception as e:
+            logger.error(f"Error in search_stream: {e}")
+            yield sse_event("error", {"detail": str(getattr(e, "detail", e))})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/query-agent/stream")
+async def query_agent_stream(request: AgentRequest):
+    """Server-Sent Events: agent `progress` and `token` events while it runs,
+    then the full `result` (answer, searches, hydrated sources) and `done`"""
+
+    async def events():
+        started = time.perf_counter()
+        try:
+            client = await get_weaviate()
+            agent = AsyncQueryAgent(client=client)
+            cfg = agent_collection_config(request.tenant)
+
+            response = None
+            emitted = streamed = False
             try:
-                client.close()
-            except:
-                pass        
-            
-            
+                with track("agent_run"):
+                    async for output in agent.stream(request.query, collections=[cfg]):
+                        output_type = getattr(output, "output_type", None)
+                        if output_type == "progress_message":
+                            emitted = True
+                            yield sse_event("progress", {"stage": output.stage, "message": output.message})
+                        elif output_type == "streamed_tokens":
+                            emitted = streamed = True
+                            yield sse_event("token", {"delta": output.delta})
+                        else:
+                            response = output
+            except Exception as e:
+                if emitted:
+                    raise
+                # Agents packages or services without streaming: run to completion instead
+                logger.warning(f"Query Agent streaming unavailable, running instead: {e}")
+                FALLBACKS.labels("agent_stream_to_run").inc()
+            if response is None:
+                with track("agent_run"):
+                    response = await agent.run(request.query, collections=[cfg])
+            if not streamed:
+                yield sse_event("token", {"delta": response.final_answer})
+
+            result = await agent_result(client, request, response)
+            yield sse_event("result", result)
+            yield sse_event("done", {"elapsed_sec": time.perf_counter() - started})
+        except Exception as e:
+            logger.error(f"Error in query_agent_stream: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
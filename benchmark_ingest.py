@@ -0,0 +1,169 @@
+"""Benchmark the ingestion pipeline against the in-process Weaviate stand-in.
+
+Generates a synthetic corpus (data/<tenant>/*.md), runs data_to_weaviate's
+pipeline on it and reports chunks/sec, peak RSS and the time per stage:
+
+    python benchmark_ingest.py --tenants 3 --files-per-tenant 200 --words-per-file 2000
+    python benchmark_ingest.py --json results.json
+    python benchmark_ingest.py --baseline results.json  # exit 1 on a >20% slowdown
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+from data_to_weaviate import (DEFAULT_BATCH_MODE, DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENT_REQUESTS,
+                              DEFAULT_QUEUE_SIZE, DEFAULT_WORKERS, StageTimer, run_ingest)
+from dedup import NearDuplicateStore
+from embeddings import CachedEmbedder, EmbeddingCache, HashingEmbedder
+from fake_weaviate import FakeCollection
+from ingest_manifest import IngestManifest
+
+VOCABULARY_SIZE = 5000
+
+def generate_corpus(root: str, tenants: int, files_per_tenant: int, words_per_file: int,
+                    duplicate_ratio: float = 0.0, seed: int = 0):
+    """Write tenants x files Markdown files of random words; a share of files are near-copies"""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(VOCABULARY_SIZE)]
+    for t in range(tenants):
+        folder = os.path.join(root, f"Tenant-{t}")
+        os.makedirs(folder, exist_ok=True)
+        previous = None
+        for f in range(files_per_tenant):
+            if previous and rng.random() < duplicate_ratio:
+                words = list(previous)
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            else:
+                words = rng.choices(vocabulary, k=words_per_file)
+            previous = words
+            with open(os.path.join(folder, f"doc_{f:05d}.md"), "w", encoding="utf-8") as out:
+                for i in range(0, len(words), 12):
+                    out.write(" ".join(words[i:i + 12]) + "\n")
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its (finished) worker processes"""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+def run_benchmark(data_dir: str, state_dir: str, latency: float, failure_rate: float,
+                  workers: int, queue_size: int, embedder: Optional[str], dedup: Optional[str],
+                  **upload_options) -> Dict:
+    collection = FakeCollection(latency=latency, failure_rate=failure_rate)
+    manifest = IngestManifest.load(os.path.join(state_dir, "manifest.json"))
+    cached_embedder = None
+    if embedder:
+        cached_embedder = CachedEmbedder(HashingEmbedder(), EmbeddingCache(os.path.join(state_dir, "embeddings.sqlite")))
+    dedup_store = NearDuplicateStore(os.path.join(state_dir, "dedup.json")) if dedup else None
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    result = run_ingest(
+        collection, data_dir, manifest,
+        workers=workers,
+        queue_size=queue_size,
+        embedder=cached_embedder,
+        dedup_store=dedup_store,
+        dedup_mode=dedup,
+        timer=timer,
+        **upload_options
+    )
+    elapsed = time.perf_counter() - start
+
+    imported = result["sent"] - len(result["errors"])
+    return {
+        "chunks": imported,
+        "seconds": elapsed,
+        "chunks_per_sec": imported / elapsed if elapsed else 0.0,
+        "stages": dict(timer.seconds),
+        "requests": sum(tenant.requests for tenant in collection.tenants.values()),
+        "stored": collection.count(),
+    }
+
+def print_report(label: str, report: Dict):
+    print(f"\n{label}: {report['chunks']} chunks in {report['seconds']:.2f}s "
+          f"({report['chunks_per_sec']:.1f} chunks/sec, {report['requests']} batch requests)")
+    for stage, seconds in sorted(report["stages"].items(), key=lambda item: -item[1]):
+        print(f"  {stage:<8} {seconds:8.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data_to_weaviate.py on a synthetic corpus")
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--files-per-tenant", type=int, default=100)
+    parser.add_argument("--words-per-file", type=int, default=2000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0,
+                        help="Share of files that are near-copies of the previous file")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated time per batch request")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of objects that fail to import")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--batch-mode", choices=["dynamic", "fixed"], default=DEFAULT_BATCH_MODE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrent-requests", type=int, default=DEFAULT_CONCURRENT_REQUESTS)
+    parser.add_argument("--embedder", choices=["hashing"], help="Include the cached embedding stage")
+    parser.add_argument("--dedup", choices=["drop", "link"], help="Include near-duplicate detection")
+    parser.add_argument("--corpus", help="Reuse this corpus folder instead of generating one")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed chunks/sec drop versus the baseline")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="ingest-bench-")
+    try:
+        data_dir = args.corpus
+        if not data_dir:
+            data_dir = os.path.join(work_dir, "data")
+            start = time.perf_counter()
+            generate_corpus(data_dir, args.tenants, args.files_per_tenant, args.words_per_file,
+                            args.duplicate_ratio)
+            print(f"Generated {args.tenants * args.files_per_tenant} files in {time.perf_counter() - start:.1f}s")
+
+        options = dict(
+            latency=args.latency_ms / 1000,
+            failure_rate=args.failure_rate,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            embedder=args.embedder,
+            dedup=args.dedup,
+            batch_mode=args.batch_mode,
+            batch_size=args.batch_size,
+            concurrent_requests=args.concurrent_requests,
+        )
+        full = run_benchmark(data_dir, work_dir, **options)
+        # Same manifest again: nothing changed, so this measures the incremental no-op path
+        resync = run_benchmark(data_dir, work_dir, **options)
+        rss = peak_rss_mb()
+
+        print_report("Full load", full)
+        print_report("Re-sync (unchanged)", resync)
+        print(f"\nPeak RSS: {rss['main']:.0f} MB main, {rss['workers']:.0f} MB largest worker")
+
+        results = {"full": full, "resync": resync, "peak_rss_mb": rss, "options": options}
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+            floor = baseline["full"]["chunks_per_sec"] * (1 - args.tolerance)
+            if full["chunks_per_sec"] < floor:
+                print(f"REGRESSION: {full['chunks_per_sec']:.1f} chunks/sec is below {floor:.1f} "
+                      f"(baseline {baseline['full']['chunks_per_sec']:.1f})")
+                sys.exit(1)
+            print(f"OK: within {args.tolerance:.0%} of baseline ({baseline['full']['chunks_per_sec']:.1f} chunks/sec)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
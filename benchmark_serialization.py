@@ -0,0 +1,133 @@
+"""Benchmark the CPU cost of serializing one /search response.
+
+Compares the previous path (a DocumentResponse per hit plus a SearchResponse,
+then FastAPI's response_model validation and serialization) with encoding
+the plain result dicts as JSON (stdlib, pydantic-core and orjson) and
+MessagePack, and reports body sizes with and without gzip. pydantic-core is
+what the API falls back to without orjson:
+
+    python benchmark_serialization.py --results 10 --content-chars 1500
+    python benchmark_serialization.py --results 100 --iterations 500 --json results.json
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+import uuid
+from typing import Callable, Dict
+
+from fastapi.routing import APIRoute, serialize_response
+from pydantic_core import to_json
+
+import serialization
+from app import GZIP_LEVEL, DocumentResponse, SearchResponse
+
+VOCABULARY_SIZE = 5000
+
+def generate_payload(results: int, content_chars: int, seed: int = 0) -> Dict:
+    """A search result shaped like execute_search's output"""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(VOCABULARY_SIZE)]
+    documents = []
+    for rank in range(results):
+        content = ""
+        while len(content) < content_chars:
+            content += rng.choice(vocabulary) + " "
+        documents.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "content": content[:content_chars],
+            "file_id": str(rng.getrandbits(40)),
+            "file_name": f"policy_{rank:03d}.md",
+            "chunk_index": rng.randrange(50),
+            "created_date": "2024-05-01T12:00:00Z",
+            "canonical_id": None,
+            "score": 1.0 - rank / (results + 1),
+        })
+    return {"documents": documents, "total_count": len(documents), "search_type": "hybrid", "query": "leave policy"}
+
+async def search_endpoint():
+    pass
+
+# The response field FastAPI builds for @app.post("/search", response_model=SearchResponse)
+RESPONSE_FIELD = APIRoute("/search", search_endpoint, response_model=SearchResponse).response_field
+
+async def encode_with_models(payload: Dict) -> bytes:
+    response = SearchResponse(
+        documents=[DocumentResponse(**document) for document in payload["documents"]],
+        total_count=payload["total_count"],
+        search_type=payload["search_type"],
+        query=payload["query"],
+    )
+    return await serialize_response(field=RESPONSE_FIELD, response_content=response,
+                                    exclude_unset=True, dump_json=True)
+
+async def measure(encode: Callable, payload: Dict, iterations: int) -> Dict:
+    """Microseconds of CPU per encoded response (best of three rounds) and body sizes"""
+    body = encode(payload)
+    if asyncio.iscoroutine(body):
+        body = await body
+    rounds = []
+    for _ in range(3):
+        start = time.process_time()
+        for _ in range(iterations):
+            result = encode(payload)
+            if asyncio.iscoroutine(result):
+                await result
+        rounds.append((time.process_time() - start) / iterations)
+    start = time.process_time()
+    compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    gzip_us = (time.process_time() - start) * 1e6
+    return {
+        "us_per_response": min(rounds) * 1e6,
+        "bytes": len(body),
+        "gzip_bytes": len(compressed),
+        "gzip_us": gzip_us,
+    }
+
+def encoders() -> Dict[str, Callable]:
+    paths = {
+        "pydantic models (before)": encode_with_models,
+        "dicts + json": lambda payload: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        "dicts + pydantic-core": to_json,
+    }
+    if serialization.orjson is not None:
+        paths["dicts + orjson"] = serialization.orjson.dumps
+    if serialization.msgpack is not None:
+        paths["dicts + msgpack"] = serialization.dumps_msgpack
+    return paths
+
+async def run_benchmark(results: int, content_chars: int, iterations: int) -> Dict[str, Dict]:
+    payload = generate_payload(results, content_chars)
+    return {name: await measure(encode, payload, iterations) for name, encode in encoders().items()}
+
+def print_report(report: Dict[str, Dict]):
+    baseline = report["pydantic models (before)"]["us_per_response"]
+    print(f"\n{'path':<26} {'us/resp':>9} {'saved':>9} {'speedup':>8} {'bytes':>9} {'gzip':>9} {'gzip us':>8}")
+    for name, row in report.items():
+        print(f"{name:<26} {row['us_per_response']:9.1f} {baseline - row['us_per_response']:9.1f} "
+              f"{baseline / row['us_per_response']:7.1f}x {row['bytes']:9d} {row['gzip_bytes']:9d} "
+              f"{row['gzip_us']:8.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /search response serialization")
+    parser.add_argument("--results", type=int, default=10, help="Documents per response")
+    parser.add_argument("--content-chars", type=int, default=1500, help="Characters of content per document")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args.results, args.content_chars, args.iterations))
+    print(f"{args.results} results x {args.content_chars} chars, {args.iterations} iterations, gzip level {GZIP_LEVEL}")
+    print_report(report)
+    missing = [name for name in ("orjson", "msgpack") if getattr(serialization, name) is None]
+    if missing:
+        print(f"\nNot installed, skipped: {', '.join(missing)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": vars(args), "results": report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+BOX_DEVELOPER_TOKEN = os.getenv('BOX_DEVELOPER_TOKEN')
+BOX_CLIENT_ID = os.getenv('BOX_CLIENT_ID')
+BOX_CLIENT_SECRET = os.getenv('BOX_CLIENT_SECRET')
+BOX_ENTERPRISE_ID = os.getenv('BOX_ENTERPRISE_ID')
+# "HR=1234,Finance=5678": Box folder id per tenant
+BOX_TENANT_FOLDERS = os.getenv('BOX_TENANT_FOLDERS', '')
+# Point at fake_box_api.py (e.g. http://localhost:8787) for local runs
+BOX_BASE_URL = os.getenv('BOX_BASE_URL')
+
+BOX_MIRROR_DIR = os.path.join(".cache", "box")
+BOX_STATE_PATH = os.path.join(".cache", "box_sync_state.json")
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+FILE_FIELDS = ["id", "type", "name", "sha1", "modified_at"]
+
+def parse_tenant_folders(value: str = BOX_TENANT_FOLDERS) -> Dict[str, str]:
+    """Parse "Tenant=folder_id,..." into {tenant: folder_id}"""
+    folders = {}
+    for pair in filter(None, (part.strip() for part in value.split(","))):
+        tenant, _, folder_id = pair.partition("=")
+        if not folder_id:
+            raise ValueError(f"Expected Tenant=folder_id in BOX_TENANT_FOLDERS, got '{pair}'")
+        folders[tenant.strip()] = folder_id.strip()
+    return folders
+
+def init_box_client(base_url: Optional[str] = BOX_BASE_URL):
+    """Box client from a developer token, or client-credentials if no token is set"""
+    from box_sdk_gen import BoxCCGAuth, BoxClient, BoxDeveloperTokenAuth, CCGConfig
+
+    if BOX_DEVELOPER_TOKEN:
+        auth = BoxDeveloperTokenAuth(token=BOX_DEVELOPER_TOKEN)
+    else:
+        auth = BoxCCGAuth(config=CCGConfig(
+            client_id=BOX_CLIENT_ID,
+            client_secret=BOX_CLIENT_SECRET,
+            enterprise_id=BOX_ENTERPRISE_ID,
+        ))
+    client = BoxClient(auth=auth)
+
+    if base_url:
+        from box_sdk_gen.networking.base_urls import BaseUrls
+        # The SDK appends the /2.0/... paths itself
+        client = client.with_custom_base_urls(BaseUrls(
+            base_url=base_url,
+            upload_url=f"{base_url}/api",
+            oauth_2_url=f"{base_url}/api/oauth2",
+        ))
+    return client
+
+def _value(field) -> str:
+    """Plain string for SDK enum fields"""
+    return getattr(field, "value", field)
+
+class BoxFolderSync:
+    """Mirror Box folders into <mirror_dir>/<tenant>/ for the ingest pipeline.
+
+    The first sync lists every mapped folder. Later syncs read the events
+    stream from the saved position and only re-list folders that had events;
+    within a folder only files whose sha1 changed are downloaded, on a bounded
+    thread pool. Files gone from Box are removed from the mirror, so the
+    pipeline deletes their chunks.
+    """
+
+    def __init__(self, client, tenant_folders: Dict[str, str],
+                 mirror_dir: str = BOX_MIRROR_DIR, state_path: str = BOX_STATE_PATH,
+                 workers: int = DEFAULT_DOWNLOAD_WORKERS):
+        self.client = client
+        self.tenant_folders = tenant_folders
+        self.mirror_dir = mirror_dir
+        self.state_path = state_path
+        self.workers = workers
+        # files: {box file id: {"tenant", "name", "sha1"}}
+        # synced_folders: folders fully mirrored; the rest are re-listed on the next sync
+        self.state = {"stream_position": None, "files": {}, "synced_folders": []}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def list_folder(self, folder_id: str) -> List:
+        """All Markdown files directly in a folder, following markers"""
+        files = []
+        marker = None
+        while True:
+            items = self.client.folders.get_folder_items(
+                folder_id, fields=FILE_FIELDS, usemarker=True, marker=marker, limit=1000
+            )
+            files.extend(
+                entry for entry in items.entries or []
+                if _value(entry.type) == "file" and entry.name.endswith(".md")
+            )
+            marker = getattr(items, "next_marker", None)
+            if not marker:
+                return files
+
+    def changed_folders(self) -> Set[str]:
+        """Folder ids with events since the saved stream position"""
+        folder_ids = set(self.tenant_folders.values())
+        position = self.state.get("stream_position")
+        if position is None:
+            events = self.client.events.get_events(stream_type="changes", stream_position="now")
+            self.state["stream_position"] = str(events.next_stream_position)
+            return set()
+
+        known_files = self.state["files"]
+        touched = set()
+        while True:
+            events = self.client.events.get_events(stream_type="changes", stream_position=position)
+            for event in events.entries or []:
+                source = getattr(event, "source", None)
+                parent = getattr(source, "parent", None)
+                if parent is not None and getattr(parent, "id", None) in folder_ids:
+                    touched.add(parent.id)
+                source_id = getattr(source, "id", None)
+                if source_id in known_files:
+                    touched.add(self.tenant_folders[known_files[source_id]["tenant"]])
+            next_position = str(events.next_stream_position)
+            if not events.entries or next_position == position:
+                break
+            position = next_position
+        self.state["stream_position"] = position
+        return touched
+
+    def download(self, tenant: str, file_id: str, name: str):
+        folder = os.path.join(self.mirror_dir, tenant)
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = os.path.join(folder, f".{name}.part")
+        stream = self.client.downloads.download_file(file_id)
+        with open(tmp_path, "wb") as f:
+            for block in iter(lambda: stream.read(1 << 20), b""):
+                f.write(block)
+        os.replace(tmp_path, os.path.join(folder, name))
+
+    def sync(self) -> Dict[Tuple[str, str], str]:
+        """Bring the mirror up to date; returns {(tenant, file name): Box file id}"""
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        synced = set(self.state["synced_folders"])
+        touched = self.changed_folders() | (set(self.tenant_folders.values()) - synced)
+        known_files = self.state["files"]
+        downloads = []
+
+        for tenant, folder_id in self.tenant_folders.items():
+            if folder_id not in touched:
+                continue
+            listed = {entry.id: entry for entry in self.list_folder(folder_id)}
+            synced.add(folder_id)
+
+            for file_id, entry in listed.items():
+                known = known_files.get(file_id)
+                on_disk = os.path.exists(os.path.join(self.mirror_dir, tenant, entry.name))
+                if known and known["sha1"] == entry.sha_1 and known["name"] == entry.name and on_disk:
+                    continue
+                if known and known["name"] != entry.name:
+                    self.remove(tenant, known["name"])
+                downloads.append((tenant, file_id, entry.name, entry.sha_1))
+
+            for file_id, known in list(known_files.items()):
+                if known["tenant"] == tenant and file_id not in listed:
+                    self.remove(tenant, known["name"])
+                    del known_files[file_id]
+
+        print(f"Box: {len(touched)} folders changed, downloading {len(downloads)} files")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(self.download, tenant, file_id, name): (tenant, file_id, name, sha1)
+                for tenant, file_id, name, sha1 in downloads
+            }
+            for future, (tenant, file_id, name, sha1) in futures.items():
+                try:
+                    future.result()
+                    known_files[file_id] = {"tenant": tenant, "name": name, "sha1": sha1}
+                except Exception as e:
+                    print(f"  Failed to download {tenant}/{name} ({file_id}): {e}")
+                    synced.discard(self.tenant_folders[tenant])
+
+        self.state["synced_folders"] = sorted(synced)
+        self.save_state()
+        return {(info["tenant"], info["name"]): file_id for file_id, info in known_files.items()}
+
+    def remove(self, tenant: str, name: str):
+        path = os.path.join(self.mirror_dir, tenant, name)
+        if os.path.exists(path):
+            os.remove(path)
@@ -14,3 +14,4 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 APP_TITLE = "Weaviate Enterprise Search"
 APP_ICON = "��"
 DEFAULT_TENANTS = ["HR", "Finance", "Customer-Service"]
+DOCUMENTS_PAGE_SIZE = 50  # documents per page when browsing a tenant
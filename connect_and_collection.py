@@ -1,7 +1,25 @@
+"""One-shot bootstrap: create the Documents schema and tenants if missing.
+
+    python connect_and_collection.py
+    python connect_and_collection.py --tenants HR Finance Legal
+    python connect_and_collection.py --vectorizer openai  # for data_to_weaviate.py --embedder openai
+
+Run it once per cluster (and again after adding tenants). Importing this
+module does nothing; the API and UI only connect lazily and never write to
+the schema.
+"""
+import argparse
+import os
+from typing import List
+
 import weaviate
 from weaviate.auth import AuthApiKey
+from weaviate.classes.config import Property, DataType, Configure
+from weaviate.classes.tenants import Tenant
 from dotenv import load_dotenv
-import os
+
+from config import DEFAULT_TENANTS
+from embeddings import OPENAI_EMBEDDING_MODEL
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,53 +28,86 @@ load_dotenv()
 WEAVIATE_URL = os.getenv('WCD_URL')
 WEAVIATE_API_KEY = os.getenv('WCD_API_KEY')
 
+COLLECTION_NAME = "Documents"
+
 # authentication and connect to WCD
 
 def init_clients( weaviate_url: str, weaviate_api_key: str):
-    
+
     # Initialize Weaviate Client with Cohere for vectorization
     weaviate_client = weaviate.connect_to_weaviate_cloud(
-        cluster_url=WEAVIATE_URL,
-        auth_credentials=AuthApiKey(WEAVIATE_API_KEY)
+        cluster_url=weaviate_url,
+        auth_credentials=AuthApiKey(weaviate_api_key)
     )
-    
+
     return weaviate_client
 
-weaviate_client = init_clients(
-    WEAVIATE_URL, WEAVIATE_API_KEY
-)
-print("Clients initialized successfully.")
+def vector_config(vectorizer: str):
+    """Weaviate's own embeddings, or OpenAI's so ingestion can upload vectors from the same model"""
+    if vectorizer == "openai":
+        return Configure.Vectors.text2vec_openai(model=OPENAI_EMBEDDING_MODEL)
+    return Configure.Vectorizer.text2vec_weaviate()
 
-# create collection
+def ensure_schema(weaviate_client, vectorizer: str = "weaviate"):
+    """Create the collection, or add properties newer code expects.
 
-from weaviate.classes.config import Property, DataType, Configure
-from weaviate.classes.tenants import Tenant
+    The vectorizer only applies when the collection is created.
+    """
+    if not weaviate_client.collections.exists(COLLECTION_NAME):
+        weaviate_client.collections.create(
+            name=COLLECTION_NAME,
+            multi_tenancy_config=Configure.multi_tenancy(enabled=True),
 
-if not weaviate_client.collections.exists("Documents"):
-    weaviate_client.collections.create(
-        name="Documents",
-        multi_tenancy_config=Configure.multi_tenancy(enabled=True),
-        
-        generative_config=Configure.Generative.cohere(),
-        properties=[
-            Property(name="file_id", data_type=DataType.TEXT, skip_vectorization=True),
-            Property(name="file_name", data_type=DataType.TEXT, skip_vectorization=True),
-            Property(name="chunk_index", data_type=DataType.INT, skip_vectorization=True),
-            Property(name="content", data_type=DataType.TEXT),
-            Property(name="created_date", data_type=DataType.TEXT, skip_vectorization=True),
-        ],
-        vector_config=Configure.Vectorizer.text2vec_weaviate()
-    )
-    print("Schema 'Documents' created successfully.")
-else:
-    print("Schema 'Documents' already exists.")
+            generative_config=Configure.Generative.cohere(),
+            properties=[
+                Property(name="file_id", data_type=DataType.TEXT, skip_vectorization=True),
+                Property(name="file_name", data_type=DataType.TEXT, skip_vectorization=True),
+                Property(name="chunk_index", data_type=DataType.INT, skip_vectorization=True),
+                Property(name="content", data_type=DataType.TEXT),
+                Property(name="created_date", data_type=DataType.TEXT, skip_vectorization=True),
+                Property(name="canonical_id", data_type=DataType.TEXT, skip_vectorization=True),
+            ],
+            vector_config=vector_config(vectorizer)
+        )
+        print(f"Schema '{COLLECTION_NAME}' created successfully.")
+        return
+
+    print(f"Schema '{COLLECTION_NAME}' already exists.")
+    # canonical_id links near-duplicate chunks (data_to_weaviate.py --dedup link)
+    existing = weaviate_client.collections.get(COLLECTION_NAME)
+    if "canonical_id" not in {p.name for p in existing.config.get().properties}:
+        existing.config.add_property(
+            Property(name="canonical_id", data_type=DataType.TEXT, skip_vectorization=True)
+        )
+        print(f"Added 'canonical_id' to schema '{COLLECTION_NAME}'.")
+
+def ensure_tenants(weaviate_client, tenants: List[str]):
+    """Create the tenants that do not exist yet"""
+    docs = weaviate_client.collections.get(COLLECTION_NAME)
+    existing = set(docs.tenants.get())
+    missing = [name for name in tenants if name not in existing]
+    if missing:
+        docs.tenants.create([Tenant(name=name) for name in missing])
+        print(f"Tenants created successfully: {', '.join(missing)}")
+    else:
+        print("Tenants already exist.")
 
-docs = weaviate_client.collections.get("Documents")
+def main():
+    parser = argparse.ArgumentParser(description="Create the Weaviate schema and tenants")
+    parser.add_argument("--tenants", nargs="+", default=DEFAULT_TENANTS,
+                        help="Tenants to provision (default: config.DEFAULT_TENANTS)")
+    parser.add_argument("--vectorizer", choices=["weaviate", "openai"], default="weaviate",
+                        help=f"Embed with text2vec-weaviate, or text2vec-openai ({OPENAI_EMBEDDING_MODEL}); "
+                             "only used when the collection is created")
+    args = parser.parse_args()
 
-docs.tenants.create([
-    Tenant(name="HR"),
-    Tenant(name="Finance"),
-    Tenant(name="Customer-Service")
-])
+    weaviate_client = init_clients(WEAVIATE_URL, WEAVIATE_API_KEY)
+    print("Clients initialized successfully.")
+    try:
+        ensure_schema(weaviate_client, args.vectorizer)
+        ensure_tenants(weaviate_client, args.tenants)
+    finally:
+        weaviate_client.close()
 
-print("Tenants created successfully.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
+import html
+import re
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 class DocumentResponse:
     def __init__(self, id: str, content: str, file_name: str, 
-                 chunk_index: int, created_date: str, score: Optional[float] = None):
+                 chunk_index: int, created_date: str, score: Optional[float] = None,
+                 file_id: Optional[str] = None):
         self.id = id
         self.content = content
+        self.file_id = file_id
         self.file_name = file_name
         self.chunk_index = chunk_index
         self.created_date = created_date
@@ -23,3 +27,128 @@ class SearchResponse:
         self.total_count = total_count
         self.search_type = search_type
         self.query = query
+
+# Properties every read path asks Weaviate for, so results carry their source file
+DOCUMENT_PROPERTIES = ["content", "file_id", "file_name", "chunk_index", "created_date", "canonical_id"]
+
+def document_from_object(obj) -> Dict[str, Any]:
+    """Flatten a Weaviate result object into the document dict the API and UI return"""
+    properties = obj.properties or {}
+    metadata = getattr(obj, "metadata", None)
+    score = getattr(metadata, "score", None)
+    distance = getattr(metadata, "distance", None)
+    if score is None and distance is not None:
+        score = 1 - distance
+    return {
+        "id": str(obj.uuid),
+        "content": properties.get("content", "No content available"),
+        "file_id": properties.get("file_id"),
+        "file_name": properties.get("file_name") or "Unknown file",
+        "chunk_index": properties.get("chunk_index") or 0,
+        "created_date": properties.get("created_date") or "",
+        "canonical_id": properties.get("canonical_id"),
+        "score": score,
+    }
+
+SNIPPET_LENGTH = 240  # characters of context kept around the matched terms
+
+_WORD_RE = re.compile(r"\w+")
+
+def truncate_content(content: str, max_length: int) -> str:
+    """Cut at a word boundary and mark the cut with an ellipsis"""
+    if len(content) <= max_length:
+        return content
+    cut = content.rfind(" ", 0, max_length)
+    return content[:cut if cut > max_length // 2 else max_length].rstrip() + "…"
+
+def make_snippet(content: str, query: str, length: int = SNIPPET_LENGTH) -> str:
+    """HTML-escaped window of about `length` characters with the most query-term matches, terms in <mark>"""
+    terms = {term.lower() for term in _WORD_RE.findall(query) if len(term) > 1}
+    if not terms:
+        return html.escape(truncate_content(content, length))
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in sorted(terms)) + r")\b", re.IGNORECASE)
+    positions = [match.start() for match in pattern.finditer(content)]
+    if not positions:
+        return html.escape(truncate_content(content, length))
+
+    # Start a little before the match that opens the densest window
+    best = max(positions, key=lambda start: sum(start <= pos < start + length for pos in positions))
+    start = max(0, best - length // 4)
+    if start:
+        space = content.find(" ", start)
+        start = space + 1 if 0 <= space < best else start
+    window = truncate_content(content[start:], length)
+    # Match the raw text and escape around the matches, so terms never match inside entities
+    parts, end = [], 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[end:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        end = match.end()
+    parts.append(html.escape(window[end:]))
+    return ("…" if start else "") + "".join(parts)
+
+def shape_document(document: Dict[str, Any], properties: Optional[List[str]] = None, query: str = "",
+                   max_content_length: Optional[int] = None, snippets: bool = False) -> Dict[str, Any]:
+    """Project a document to `properties` (id and score always stay) and trim its content"""
+    if properties is not None:
+        document = {key: value for key, value in document.items()
+                    if key in properties or key in ("id", "score")}
+    content = document.get("content")
+    if content:
+        if snippets:
+            document["content"] = make_snippet(content, query, max_content_length or SNIPPET_LENGTH)
+        elif max_content_length:
+            document["content"] = truncate_content(content, max_content_length)
+    return document
+
+# Hits fetched per requested result, so collapsing linked near-duplicates still fills the limit
+DUPLICATE_OVERFETCH = 2
+
+def _group_keys(documents: List[Dict[str, Any]], limit: Optional[int] = None) -> List[str]:
+    """Canonical chunk id per group of near-duplicates, best-ranked group first"""
+    keys = list(dict.fromkeys(document.get("canonical_id") or document["id"] for document in documents))
+    return keys[:limit] if limit else keys
+
+def missing_canonicals(documents: List[Dict[str, Any]], limit: Optional[int] = None) -> List[str]:
+    """Canonical chunks of the top `limit` groups that are not among the hits themselves"""
+    ids = {document["id"] for document in documents}
+    return [key for key in _group_keys(documents, limit) if key not in ids]
+
+def collapse_duplicates(documents: List[Dict[str, Any]], limit: Optional[int] = None,
+                        canonicals: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """One hit per canonical chunk: near-duplicates linked at ingest share a canonical_id.
+
+    Groups are ranked by their best hit, which also gives the score, and each
+    is returned as the canonical chunk itself, taken from the hits or from
+    `canonicals` (fetched by id); a group whose canonical is gone keeps its best hit.
+    """
+    by_id = {**(canonicals or {}), **{document["id"]: document for document in documents}}
+    best = {}
+    for document in documents:
+        best.setdefault(document.get("canonical_id") or document["id"], document)
+    return [
+        {**by_id.get(key, best[key]), "score": best[key].get("score")}
+        for key in _group_keys(documents, limit)
+    ]
+
+RRF_K = 60  # damping constant from the reciprocal rank fusion paper
+
+def fuse_results(results: Dict[str, List[Dict[str, Any]]], method: str = "rrf",
+                 limit: int = 10) -> List[Dict[str, Any]]:
+    """Merge ranked per-tenant result lists into one top-`limit` list tagged with each hit's tenant.
+
+    "rrf" scores a hit 1 / (RRF_K + rank), so tenants with different score
+    scales mix fairly; "score" min-max normalizes each tenant's scores to 0..1.
+    """
+    fused = []
+    for tenant, documents in results.items():
+        scores = [document.get("score") or 0.0 for document in documents]
+        low, high = min(scores, default=0.0), max(scores, default=0.0)
+        for rank, (document, score) in enumerate(zip(documents, scores), start=1):
+            if method == "rrf":
+                fused_score = 1.0 / (RRF_K + rank)
+            else:
+                fused_score = (score - low) / (high - low) if high > low else 1.0
+            fused.append({**document, "tenant": tenant, "score": fused_score})
+    fused.sort(key=lambda document: document["score"], reverse=True)
+    return fused[:limit]
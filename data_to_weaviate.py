@@ -1,8 +1,31 @@
+import argparse
+import hashlib
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
 import weaviate
 from weaviate.auth import AuthApiKey
-from weaviate.classes.tenants import Tenant
+from weaviate.classes.query import Filter
+from weaviate.util import generate_uuid5
 from dotenv import load_dotenv
-import os
+
+from box_source import (BOX_MIRROR_DIR, DEFAULT_DOWNLOAD_WORKERS, BoxFolderSync, init_box_client,
+                        parse_tenant_folders)
+from dedup import (DEDUP_INDEX_PATH, DEFAULT_NUM_PERM, DEFAULT_THRESHOLD, NearDuplicateIndex,
+                   NearDuplicateStore, filter_near_duplicates, get_minhasher)
+from embeddings import (EMBEDDING_CACHE_PATH, INGEST_EMBEDDERS, CachedEmbedder, EmbeddingCache, check_vectorizer,
+                        get_embedder)
+from ingest_manifest import CHECKPOINT_PATH, IngestCheckpoint, IngestManifest, MANIFEST_PATH
+from tenant_versions import TenantVersions, create_tenant_versions
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,51 +34,641 @@ load_dotenv()
 WEAVIATE_URL = os.getenv('WCD_URL')
 WEAVIATE_API_KEY = os.getenv('WCD_API_KEY')
 
+COLLECTION_NAME = "Documents"
+CHUNK_SIZE = 200  # words per chunk
+
+# Batch defaults (override on the command line)
+DEFAULT_BATCH_MODE = "dynamic"
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENT_REQUESTS = 2
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_CHECKPOINT_EVERY = 1000  # objects per confirmed (checkpointed) batch
+
+DELETE_BATCH_SIZE = 500  # UUIDs per delete_many filter
+
+# Chunking pipeline defaults
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_QUEUE_SIZE = 32  # chunked files buffered between the pool and the uploader
+DEFAULT_EMBED_BATCH_SIZE = 64  # chunks per embedder call
+
 # authentication and connect to WCD
 
 def init_clients(weaviate_url: str, weaviate_api_key: str):
-    
+
     weaviate_client = weaviate.connect_to_weaviate_cloud(
         cluster_url=WEAVIATE_URL,
         auth_credentials=AuthApiKey(WEAVIATE_API_KEY)
     )
-    
+
     return weaviate_client
 
-weaviate_client = init_clients(
-    WEAVIATE_URL, WEAVIATE_API_KEY
-)
-print("Clients initialized successfully.")
+class StageTimer:
+    """Seconds spent per pipeline stage: read, chunk (summed over workers), wait, embed, upload, delete"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    def add(self, stage: str, seconds: float):
+        self.seconds[stage] += seconds
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+def iter_tenant_folders(parent_folder: str) -> Iterator[Tuple[str, str]]:
+    """Yield (tenant, folder path) for every subfolder of the data folder"""
+    for subfolder in sorted(os.listdir(parent_folder)):
+        subfolder_path = os.path.join(parent_folder, subfolder)
+        if os.path.isdir(subfolder_path):  # only process folders
+            yield subfolder, subfolder_path
+
+def discover_files(parent_folder: str) -> Iterator[Tuple[str, str, str]]:
+    """Lazily yield (tenant, file name, path) for every Markdown file, tenant by tenant"""
+    for tenant, folder_path in iter_tenant_folders(parent_folder):
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".md"):  # only process Markdown files
+                    yield tenant, entry.name, entry.path
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def file_hash(file_path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def chunk_uuid(tenant: str, file_name: str, chunk_index: int, chunk_hash: str) -> str:
+    """Deterministic object UUID, so re-importing a chunk overwrites it instead of duplicating it"""
+    return generate_uuid5(f"{tenant}/{file_name}/{chunk_index}/{chunk_hash}")
+
+def file_uuid(tenant: str, file_name: str) -> str:
+    """Stable file_id shared by every chunk of a file"""
+    return generate_uuid5(f"{tenant}/{file_name}")
+
+def iter_word_chunks(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Split a file into chunks of `chunk_size` words, reading it line by line"""
+    words = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            words.extend(line.split())
+            while len(words) >= chunk_size:
+                yield " ".join(words[:chunk_size])
+                del words[:chunk_size]
+    if words:
+        yield " ".join(words)
+
+def chunk_file(tenant: str, file_name: str, file_path: str,
+               known_hash: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+               num_perm: int = 0, file_id: Optional[str] = None) -> Dict:
+    """Hash a file and chunk it unless it still matches `known_hash`.
+
+    Runs in a worker process; "chunks" is None for unchanged files. With
+    `num_perm`, each chunk also gets a MinHash signature for near-duplicate checks.
+    `file_id` defaults to a UUID derived from tenant and file name.
+    """
+    start = time.perf_counter()
+    sha256 = file_hash(file_path)
+    read_seconds = time.perf_counter() - start
+    chunks = None
+    if sha256 != known_hash:
+        chunks = []
+        for chunk_index, chunk in enumerate(iter_word_chunks(file_path, chunk_size)):
+            chunk_hash = content_hash(chunk)
+            chunks.append({
+                "uuid": chunk_uuid(tenant, file_name, chunk_index, chunk_hash),
+                "hash": chunk_hash,
+                "content": chunk,
+            })
+            if num_perm:
+                chunks[-1]["minhash"] = get_minhasher(num_perm).signature(chunk)
+    return {
+        "timings": {"read": read_seconds, "chunk": time.perf_counter() - start - read_seconds},
+        "tenant": tenant,
+        "file_name": file_name,
+        "file_id": file_id or file_uuid(tenant, file_name),
+        "created_date": datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d"),
+        "sha256": sha256,
+        "chunks": chunks,
+    }
+
+_DONE = object()
+
+def iter_chunked_files(parent_folder: str, known_hashes: Dict[Tuple[str, str], str],
+                       workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                       chunk_size: int = CHUNK_SIZE, num_perm: int = 0,
+                       file_ids: Optional[Dict[Tuple[str, str], str]] = None,
+                       timer: Optional[StageTimer] = None) -> Iterator[Dict]:
+    """Chunk files in a process pool and stream the results in discovery order.
+
+    A background thread keeps at most `queue_size` files in the pool and another
+    `queue_size` waiting in a bounded queue, so chunking runs ahead of the
+    uploader without ever holding the whole tree in memory.
+    """
+    timer = timer or StageTimer()
+    results = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            # spawn, not fork: the parent already has gRPC threads running
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending = deque()
+                try:
+                    for tenant, file_name, file_path in discover_files(parent_folder):
+                        pending.append(pool.submit(
+                            chunk_file, tenant, file_name, file_path,
+                            known_hashes.get((tenant, file_name)), chunk_size, num_perm,
+                            (file_ids or {}).get((tenant, file_name))
+                        ))
+                        if len(pending) >= queue_size and not put(pending.popleft().result()):
+                            return
+                    while pending:
+                        if not put(pending.popleft().result()):
+                            return
+                finally:
+                    for future in pending:
+                        future.cancel()
+        except BaseException as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name="chunker", daemon=True)
+    producer.start()
+    try:
+        while True:
+            with timer.time("wait"):
+                item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+def iter_changed_chunks(tenant: str, chunked_files: Iterable[Dict], manifest: IngestManifest,
+                        changes: Dict[str, Dict], seen: Set[str], full: bool = False,
+                        confirmed: Optional[Set[str]] = None,
+                        dedup: Optional[NearDuplicateIndex] = None,
+                        timer: Optional[StageTimer] = None) -> Iterator[Dict]:
+    """Yield objects for chunks that are not in the manifest yet.
+
+    Every file whose hash differs from the manifest is recorded in `changes`
+    with its new chunk UUIDs and the stale UUIDs to delete once it is uploaded;
+    every file name is added to `seen`. Chunks in `confirmed` (already uploaded
+    by an interrupted run) are skipped. Stale chunks leave the `dedup` index
+    before the file's new chunks are yielded, so an edited chunk is never
+    matched to its own previous version.
+    """
+    confirmed = confirmed or set()
+    timer = timer or StageTimer()
+    for chunked in chunked_files:
+        for stage, seconds in chunked["timings"].items():
+            timer.add(stage, seconds)
+        file_name = chunked["file_name"]
+        seen.add(file_name)
+        if chunked["chunks"] is None:
+            continue
+
+        entry = manifest.get_file(tenant, file_name)
+        previous_ids = set(entry["chunks"]) if entry else set()
+        chunk_ids = [chunk["uuid"] for chunk in chunked["chunks"]]
+        stale_ids = sorted(previous_ids - set(chunk_ids))
+        if dedup is not None:
+            for object_id in stale_ids:
+                dedup.remove(object_id)
+
+        for chunk_index, chunk in enumerate(chunked["chunks"]):
+            if chunk["uuid"] in confirmed:
+                continue
+            if full or chunk["uuid"] not in previous_ids:
+                obj = {
+                    "uuid": chunk["uuid"],
+                    "hash": chunk["hash"],
+                    "properties": {
+                        "file_id": chunked["file_id"],
+                        "file_name": file_name,
+                        "chunk_index": chunk_index,
+                        "content": chunk["content"],
+                        "created_date": chunked["created_date"],
+                    }
+                }
+                if "minhash" in chunk:
+                    obj["minhash"] = chunk["minhash"]
+                yield obj
+
+        changes[file_name] = {
+            "sha256": chunked["sha256"],
+            "chunks": chunk_ids,
+            "stale": stale_ids,
+        }
+
+def embed_objects(objects: Iterable[Dict], embedder: CachedEmbedder,
+                  batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+                  timer: Optional[StageTimer] = None) -> Iterator[Dict]:
+    """Attach a precomputed vector to each object, embedding `batch_size` chunks at a time"""
+    timer = timer or StageTimer()
+    buffer = []
+    for obj in itertools.chain(objects, [None]):
+        if obj is not None:
+            buffer.append(obj)
+            if len(buffer) < batch_size:
+                continue
+        if not buffer:
+            break
+        with timer.time("embed"):
+            vectors = embedder.embed(
+                [item["properties"]["content"] for item in buffer],
+                [item["hash"] for item in buffer]
+            )
+        for item, vector in zip(buffer, vectors):
+            item["vector"] = vector
+            yield item
+        buffer = []
 
-multi_collection = weaviate_client.collections.get("Documents")
+def open_batch(tenant_collection, batch_mode: str, batch_size: int, concurrent_requests: int):
+    """Open a dynamic or fixed-size batch context on a tenant collection"""
+    if batch_mode == "dynamic":
+        return tenant_collection.batch.dynamic()
+    return tenant_collection.batch.fixed_size(
+        batch_size=batch_size,
+        concurrent_requests=concurrent_requests
+    )
+
+def upload_batch(tenant_collection, objects: List[Dict],
+                 batch_mode: str = DEFAULT_BATCH_MODE,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrent_requests: int = DEFAULT_CONCURRENT_REQUESTS,
+                 max_retries: int = DEFAULT_MAX_RETRIES) -> List:
+    """Upload one batch of objects, retrying only the ones that failed.
+
+    Returns the errors left after the last retry.
+    """
+    pending = objects
+    failed = []
+
+    for attempt in range(max_retries + 1):
+        with open_batch(tenant_collection, batch_mode, batch_size, concurrent_requests) as batch:
+            for obj in pending:
+                batch.add_object(
+                    properties=obj["properties"],
+                    uuid=obj.get("uuid"),
+                    vector=obj.get("vector")
+                )
+
+        failed = list(tenant_collection.batch.failed_objects)
+        if not failed or attempt == max_retries:
+            break
+
+        print(f"  {len(failed)} objects failed, retrying ({attempt + 1}/{max_retries})...")
+        # Re-send with the UUID the batch assigned so a late success is not duplicated
+        pending = [
+            {
+                "properties": err.object_.properties,
+                "uuid": err.object_.uuid,
+                "vector": err.object_.vector,
+            }
+            for err in failed
+        ]
+        time.sleep(2 ** attempt)
+
+    return failed
+
+def upload_objects(tenant_collection, objects: Iterable[Dict],
+                   checkpoint: Optional[IngestCheckpoint] = None,
+                   tenant: Optional[str] = None,
+                   checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                   timer: Optional[StageTimer] = None,
+                   **batch_options) -> Tuple[int, List]:
+    """Upload a stream of objects in checkpointed batches of `checkpoint_every`.
+
+    Each batch is flushed and retried before the next one starts, and the
+    objects it confirmed are logged to the checkpoint. Returns the number of
+    objects sent and the errors left after the last retry.
+    """
+    timer = timer or StageTimer()
+    objects = iter(objects)
+    sent = 0
+    failed = []
+
+    while True:
+        batch_objects = list(itertools.islice(objects, checkpoint_every))
+        if not batch_objects:
+            break
+
+        with timer.time("upload"):
+            batch_failed = upload_batch(tenant_collection, batch_objects, **batch_options)
+        sent += len(batch_objects)
+        failed.extend(batch_failed)
+
+        if checkpoint is not None:
+            failed_ids = {str(err.object_.uuid) for err in batch_failed}
+            checkpoint.record(tenant, [obj for obj in batch_objects if str(obj["uuid"]) not in failed_ids])
+
+    return sent, failed
+
+def delete_objects(tenant_collection, object_ids: List[str]) -> int:
+    """Delete objects by UUID, a few hundred per request"""
+    deleted = 0
+    for i in range(0, len(object_ids), DELETE_BATCH_SIZE):
+        result = tenant_collection.data.delete_many(
+            where=Filter.by_id().contains_any(object_ids[i:i + DELETE_BATCH_SIZE])
+        )
+        deleted += result.successful
+    return deleted
+
+def sync_tenant(tenant_collection, tenant: str, chunked_files: Iterable[Dict], manifest: IngestManifest,
+                full: bool = False, embedder: Optional[CachedEmbedder] = None,
+                checkpoint: Optional[IngestCheckpoint] = None,
+                dedup: Optional[NearDuplicateIndex] = None, dedup_mode: str = "drop",
+                timer: Optional[StageTimer] = None, **upload_options) -> Dict:
+    """Upsert new/changed chunks of one tenant and delete the ones that disappeared.
+
+    With an embedder, objects are uploaded with precomputed vectors instead of
+    being vectorized by the server. With a checkpoint, confirmed batches are
+    logged and chunks confirmed by an earlier, interrupted run are skipped.
+    With a near-duplicate index, duplicates are dropped or linked (`dedup_mode`).
+    """
+    changes = {}
+    seen = set()
+    dedup_report = {}
+    dropped = {}
+    confirmed = checkpoint.confirmed_ids(tenant) if checkpoint else None
+    timer = timer or StageTimer()
+    objects = iter_changed_chunks(tenant, chunked_files, manifest, changes, seen,
+                                  full=full, confirmed=confirmed, dedup=dedup, timer=timer)
+    if dedup is not None:
+        objects = filter_near_duplicates(objects, dedup, dedup_mode, dedup_report, dropped)
+    if embedder:
+        objects = embed_objects(objects, embedder, timer=timer)
+    sent, failed = upload_objects(tenant_collection, objects, checkpoint=checkpoint, tenant=tenant,
+                                  timer=timer, **upload_options)
+    failed_ids = {str(err.object_.uuid) for err in failed}
+
+    stale_ids = []
+    for file_name, change in changes.items():
+        file_failed = failed_ids.intersection(change["chunks"])
+        file_dropped = {object_id: dropped[object_id] for object_id in change["chunks"] if object_id in dropped}
+        stale_ids.extend(change["stale"])
+        # A file with failed chunks keeps no hash, so the next run retries it; dropped
+        # duplicates are only re-checked once their canonical chunk is removed (below)
+        manifest.set_file(
+            tenant, file_name,
+            None if file_failed else change["sha256"],
+            [object_id for object_id in change["chunks"]
+             if object_id not in file_failed and object_id not in file_dropped],
+            file_dropped
+        )
+
+    for file_name in manifest.files(tenant):
+        if file_name not in seen:
+            stale_ids.extend(manifest.get_file(tenant, file_name)["chunks"])
+            manifest.remove_file(tenant, file_name)
+
+    with timer.time("delete"):
+        deleted = delete_objects(tenant_collection, stale_ids) if stale_ids else 0
+    if dedup is not None:
+        for object_id in stale_ids:
+            dedup.remove(object_id)
+    # Their duplicates may now be the only copy: the next run uploads them
+    manifest.recheck_dropped(tenant, stale_ids)
+    manifest.save()
+
+    return {
+        "files_changed": len(changes),
+        "sent": sent,
+        "failed": failed,
+        "deleted": deleted,
+        "dedup": dedup_report,
+    }
+
+def run_ingest(multi_collection, data_dir: str, manifest: IngestManifest,
+               checkpoint: Optional[IngestCheckpoint] = None, full: bool = False,
+               workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+               embedder: Optional[CachedEmbedder] = None,
+               dedup_store: Optional[NearDuplicateStore] = None, dedup_mode: Optional[str] = None,
+               file_ids: Optional[Dict[Tuple[str, str], str]] = None,
+               tenant_versions: Optional[TenantVersions] = None,
+               timer: Optional[StageTimer] = None, **upload_options) -> Dict:
+    """Sync every tenant folder under `data_dir` into the collection.
+
+    Tenants that were written to, by this run or by the interrupted run the
+    checkpoint resumes, get their version bumped in `tenant_versions`, which
+    invalidates the results cached by the API and UI.
+
+    Returns the number of objects sent, the (tenant, error) pairs left after
+    retries, and the near-duplicate report per tenant.
+    """
+    timer = timer or StageTimer()
+    known_hashes = {} if full else {
+        (tenant, file_name): entry["sha256"]
+        for tenant, files in manifest.tenants.items()
+        for file_name, entry in files.items()
+    }
+    chunked_files = iter_chunked_files(
+        data_dir, known_hashes,
+        workers=workers,
+        queue_size=queue_size,
+        num_perm=DEFAULT_NUM_PERM if dedup_store else 0,
+        file_ids=file_ids,
+        timer=timer
+    )
+
+    total_sent = 0
+    errors = []
+    dedup_reports = {}
+
+    def sync(tenant: str, tenant_files: Iterable[Dict]):
+        nonlocal total_sent
+        print(f"\n=== Folder: {tenant} ===")
+        tenant_collection = multi_collection.with_tenant(tenant)
+
+        stats = sync_tenant(
+            tenant_collection, tenant, tenant_files, manifest,
+            full=full,
+            embedder=embedder,
+            checkpoint=checkpoint,
+            dedup=dedup_store.index(tenant) if dedup_store else None,
+            dedup_mode=dedup_mode,
+            timer=timer,
+            **upload_options
+        )
+        total_sent += stats["sent"]
+        errors.extend((tenant, err) for err in stats["failed"])
+        print(f"  {stats['files_changed']} files changed: "
+              f"{stats['sent'] - len(stats['failed'])} chunks upserted, "
+              f"{len(stats['failed'])} failed, {stats['deleted']} deleted")
+        # A resumed run may send nothing for a tenant whose writes the crashed run already confirmed
+        confirmed = checkpoint.confirmed_ids(tenant) if checkpoint else None
+        if tenant_versions and (stats["sent"] > len(stats["failed"]) or stats["deleted"] or confirmed):
+            tenant_versions.bump([tenant])
+        if dedup_store:
+            dedup_store.save()
+            dedup_reports[tenant] = stats["dedup"]
+
+    synced = set()
+    for tenant, tenant_files in itertools.groupby(chunked_files, key=lambda chunked: chunked["tenant"]):
+        synced.add(tenant)
+        sync(tenant, tenant_files)
+
+    # Tenants whose folder is now empty (or gone) never appear in the stream; their chunks still go
+    for tenant in sorted(set(manifest.tenants) - synced):
+        if manifest.files(tenant):
+            sync(tenant, [])
+
+    return {
+        "sent": total_sent,
+        "errors": errors,
+        "dedup": dedup_reports,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load data/<tenant>/*.md into the Documents collection")
+    parser.add_argument("--source", choices=["local", "box"], default="local",
+                        help="Read --data-dir, or mirror the Box folders in BOX_TENANT_FOLDERS first")
+    parser.add_argument("--data-dir", default="data", help="Folder containing one subfolder per tenant")
+    parser.add_argument("--box-mirror", default=BOX_MIRROR_DIR,
+                        help="Local mirror of the Box folders (--source box)")
+    parser.add_argument("--box-workers", type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+                        help="Concurrent Box downloads")
+    parser.add_argument("--batch-mode", choices=["dynamic", "fixed"], default=DEFAULT_BATCH_MODE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Objects per request (fixed mode)")
+    parser.add_argument("--concurrent-requests", type=int, default=DEFAULT_CONCURRENT_REQUESTS,
+                        help="Batch requests in flight at once (fixed mode)")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Retries for objects that failed to import")
+    parser.add_argument("--manifest", default=MANIFEST_PATH,
+                        help="Local record of the chunks already imported")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-upload every chunk")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Processes used to read and chunk files")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Chunked files buffered ahead of the uploader")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help="Log of confirmed batches for the run in progress")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help="Objects per confirmed batch")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run, skipping batches already confirmed")
+    parser.add_argument("--dedup", choices=["drop", "link"],
+                        help="Detect near-duplicate chunks per tenant and drop them "
+                             "or link them to their canonical chunk")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Estimated Jaccard similarity above which chunks are duplicates")
+    parser.add_argument("--dedup-index", default=DEDUP_INDEX_PATH,
+                        help="File keeping the MinHash signatures of imported chunks")
+    parser.add_argument("--embedder", choices=INGEST_EMBEDDERS,
+                        help="Embed chunks client-side (cached) and upload the vectors; by default the "
+                             "collection's vectorizer embeds them. The collection must use the same model")
+    parser.add_argument("--embedding-cache", default=EMBEDDING_CACHE_PATH,
+                        help="SQLite file caching vectors by model and chunk hash")
+    parser.add_argument("--tenant-versions",
+                        help="File bumped per written tenant so the API and UI drop cached results "
+                             "(default: TENANT_VERSIONS_PATH or .cache/ next to the code; "
+                             "Redis when QUERY_CACHE_REDIS_URL is set)")
+    args = parser.parse_args()
+
+    weaviate_client = init_clients(
+        WEAVIATE_URL, WEAVIATE_API_KEY
+    )
+    print("Clients initialized successfully.")
 
-# Path to the parent folder that contains the 5 subfolders
-parent_folder = "data"
+    try:
+        multi_collection = weaviate_client.collections.get(COLLECTION_NAME)
+        manifest = IngestManifest.load(args.manifest)
+        checkpoint = IngestCheckpoint(args.checkpoint, resume=args.resume)
+        if args.resume:
+            print(f"Resuming: {sum(len(ids) for ids in checkpoint.confirmed.values())} chunks already confirmed")
+        dedup_store = NearDuplicateStore(args.dedup_index, args.dedup_threshold) if args.dedup else None
+        embedder = None
+        if args.embedder:
+            model = get_embedder(args.embedder)
+            try:
+                check_vectorizer(model, multi_collection.config.get())
+            except ValueError as e:
+                parser.error(str(e))
+            embedder = CachedEmbedder(model, EmbeddingCache(args.embedding_cache))
 
-# Iterate through each subfolder inside the parent folder
-for subfolder in os.listdir(parent_folder):
-    subfolder_path = os.path.join(parent_folder, subfolder)
-    tenant_collcection = multi_collection.with_tenant(subfolder)
+        data_dir, file_ids = args.data_dir, None
+        if args.source == "box":
+            box_sync = BoxFolderSync(
+                init_box_client(), parse_tenant_folders(),
+                mirror_dir=args.box_mirror, workers=args.box_workers
+            )
+            file_ids = box_sync.sync()
+            data_dir = args.box_mirror
 
-    if os.path.isdir(subfolder_path):  # only process folders
-        print(f"\n=== Folder: {subfolder} ===")
+        timer = StageTimer()
+        start = time.perf_counter()
+        result = run_ingest(
+            multi_collection, data_dir, manifest, checkpoint,
+            full=args.full,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            embedder=embedder,
+            dedup_store=dedup_store,
+            dedup_mode=args.dedup,
+            file_ids=file_ids,
+            tenant_versions=create_tenant_versions(args.tenant_versions),
+            timer=timer,
+            checkpoint_every=args.checkpoint_every,
+            batch_mode=args.batch_mode,
+            batch_size=args.batch_size,
+            concurrent_requests=args.concurrent_requests,
+            max_retries=args.max_retries
+        )
+        total_sent, errors, dedup_reports = result["sent"], result["errors"], result["dedup"]
 
-        for item in os.listdir(subfolder_path):
-            if item.endswith(".md"):  # only process Markdown files
-                file_path = os.path.join(subfolder_path, item)
+        # Every tenant is in the manifest now, the checkpoint is no longer needed
+        checkpoint.clear()
 
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
+        elapsed = time.perf_counter() - start
+        imported = total_sent - len(errors)
+        print(f"\nImported {imported} chunks in {elapsed:.2f}s "
+              f"({imported / elapsed if elapsed else 0:.1f} chunks/sec)")
 
-                content = content.split()
+        if dedup_store:
+            print(f"\nNear-duplicates ({'dropped' if args.dedup == 'drop' else 'linked'}):")
+            for tenant, report in dedup_reports.items():
+                checked = report.get("checked", 0)
+                duplicates = report.get("duplicates", 0)
+                print(f"  {tenant}: {duplicates} of {checked} new chunks "
+                      f"({100 * duplicates / checked if checked else 0:.1f}%)")
 
-                for i in range(0, len(content), 200):
-                    chunk = " ".join(content[i:i + 200])
-                    tenant_collcection.data.insert(
-                        properties={
-                            "content": chunk
-                        }
-                    )
+        if embedder:
+            print(f"Embeddings ({embedder.model_id}): {embedder.hits} cached, {embedder.misses} computed")
 
+        print("Stage times (s): " + ", ".join(
+            f"{stage} {seconds:.2f}" for stage, seconds in sorted(timer.seconds.items())
+        ))
 
+        if errors:
+            print(f"{len(errors)} chunks could not be imported:")
+            for tenant, err in errors[:20]:
+                print(f"  [{tenant}] {err.object_.uuid}: {err.message}")
+    finally:
+        weaviate_client.close()
 
+if __name__ == "__main__":
+    main()
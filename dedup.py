@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import random
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# MinHash / LSH parameters: 16 bands of 4 rows catch pairs above ~0.5 Jaccard,
+# the threshold then filters candidates on their estimated similarity
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 5  # words per shingle
+
+DEDUP_INDEX_PATH = os.path.join(".cache", "near_duplicates.json")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Hashed, lower-cased word n-grams of a chunk"""
+    words = text.lower().split()
+    grams = [" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))]
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+        for gram in grams
+    }
+
+class MinHasher:
+    """MinHash signatures from `num_perm` universal hash functions with a fixed seed"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.coefficients = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> List[int]:
+        values = shingles(text)
+        return [
+            min((a * value + b) % _MERSENNE_PRIME for value in values)
+            for a, b in self.coefficients
+        ]
+
+@lru_cache(maxsize=4)
+def get_minhasher(num_perm: int = DEFAULT_NUM_PERM) -> MinHasher:
+    return MinHasher(num_perm)
+
+def estimate_similarity(left: List[int], right: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+class NearDuplicateIndex:
+    """LSH index over the MinHash signatures of one tenant's chunks"""
+
+    def __init__(self, bands: int = DEFAULT_BANDS, threshold: float = DEFAULT_THRESHOLD):
+        self.bands = bands
+        self.threshold = threshold
+        self.signatures = {}  # {uuid: signature}
+        self.buckets = {}  # {(band, band hash): set of uuids}
+
+    def _band_keys(self, signature: List[int]):
+        rows = len(signature) // self.bands
+        for band in range(self.bands):
+            yield band, hash(tuple(signature[band * rows:(band + 1) * rows]))
+
+    def find(self, signature: List[int]) -> Optional[str]:
+        """UUID of the most similar indexed chunk above the threshold, if any"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best_id, best_score = None, self.threshold
+        for candidate in candidates:
+            score = estimate_similarity(signature, self.signatures[candidate])
+            if score >= best_score:
+                best_id, best_score = candidate, score
+        return best_id
+
+    def add(self, object_id: str, signature: List[int]):
+        self.remove(object_id)
+        self.signatures[object_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(object_id)
+
+    def remove(self, object_id: str):
+        signature = self.signatures.pop(object_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket:
+                bucket.discard(object_id)
+                if not bucket:
+                    del self.buckets[key]
+
+class NearDuplicateStore:
+    """Per-tenant indexes persisted between runs, so unchanged chunks still count as canonicals"""
+
+    def __init__(self, path: str = DEDUP_INDEX_PATH, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.indexes = {}
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for tenant, signatures in json.load(f).items():
+                    index = self.index(tenant)
+                    for object_id, signature in signatures.items():
+                        index.add(object_id, signature)
+
+    def index(self, tenant: str) -> NearDuplicateIndex:
+        if tenant not in self.indexes:
+            self.indexes[tenant] = NearDuplicateIndex(threshold=self.threshold)
+        return self.indexes[tenant]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({tenant: index.signatures for tenant, index in self.indexes.items()}, f)
+        os.replace(tmp_path, self.path)
+
+def filter_near_duplicates(objects: Iterable[Dict], index: NearDuplicateIndex,
+                           mode: str, report: Dict, dropped: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+    """Drop near-duplicate objects, or link them to their canonical chunk.
+
+    Objects need a "minhash" signature. In "link" mode duplicates are kept with
+    `canonical_id` set; in "drop" mode they are not yielded and `dropped` maps
+    their UUIDs to their canonical's. Counts go to `report`.
+    """
+    for obj in objects:
+        signature = obj.pop("minhash")
+        report["checked"] = report.get("checked", 0) + 1
+
+        canonical_id = index.find(signature)
+        if canonical_id is None or canonical_id == obj["uuid"]:
+            index.add(obj["uuid"], signature)
+            yield obj
+            continue
+
+        report["duplicates"] = report.get("duplicates", 0) + 1
+        if mode == "link":
+            obj["properties"]["canonical_id"] = canonical_id
+            yield obj
+        elif dropped is not None:
+            dropped[obj["uuid"]] = canonical_id
@@ -0,0 +1,200 @@
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+EMBEDDING_CACHE_PATH = os.path.join(".cache", "embeddings.sqlite")
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+class Embedder:
+    """Turns texts into vectors; `model_id` is part of every cache key.
+
+    `weaviate_vectorizer` names the Weaviate module that embeds queries with the
+    same model. Only such embedders may upload vectors: near_text and hybrid
+    queries are vectorized server-side and must land in the same space.
+    `semantic` embedders place paraphrases close together; only they can back
+    the API's semantic cache.
+    """
+
+    model_id = "base"
+    weaviate_vectorizer: Optional[str] = None
+    semantic = False
+
+    def matches_vectorizer(self, vectorizer: str, settings: Dict) -> bool:
+        return False
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+class HashingEmbedder(Embedder):
+    """Deterministic feature-hashing embedder that runs offline.
+
+    Each lower-cased word is hashed to a signed bucket and the result is
+    L2-normalised, so the same text always gets the same vector. No Weaviate
+    vectorizer matches it: it is for benchmarks and tests only.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.model_id = f"hashing-{dimensions}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimensions
+            for token in _TOKEN_RE.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+                vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API, called in batches"""
+
+    weaviate_vectorizer = "text2vec-openai"
+    semantic = True
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, api_key: Optional[str] = OPENAI_API_KEY):
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY is not set")
+        self.model = model
+        self.model_id = f"openai/{model}"
+        self.api_key = api_key
+
+    def matches_vectorizer(self, vectorizer: str, settings: Dict) -> bool:
+        # Weaviate's text2vec-openai defaults to text-embedding-3-small at full dimensions
+        return (vectorizer == self.weaviate_vectorizer
+                and (settings.get("model") or OPENAI_EMBEDDING_MODEL) == self.model
+                and not settings.get("dimensions"))
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = requests.post(
+            "https://api.openai.com/v1/embeddings",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={"model": self.model, "input": texts},
+            timeout=60,
+        )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+# Embedders data_to_weaviate.py may upload vectors from
+INGEST_EMBEDDERS = sorted(name for name, cls in EMBEDDERS.items() if cls.weaviate_vectorizer)
+
+def get_embedder(name: str) -> Embedder:
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{name}', expected one of {sorted(EMBEDDERS)}")
+    return EMBEDDERS[name]()
+
+def collection_vectorizers(config) -> List[Tuple[str, Dict]]:
+    """(vectorizer module, settings) of a collection's default and named vectors"""
+    found = []
+    if config.vectorizer_config is not None:
+        vectorizer = config.vectorizer_config.vectorizer
+        found.append((getattr(vectorizer, "value", vectorizer), config.vectorizer_config.model or {}))
+    for named in (config.vector_config or {}).values():
+        vectorizer = named.vectorizer.vectorizer
+        found.append((getattr(vectorizer, "value", vectorizer), named.vectorizer.model or {}))
+    return found
+
+def check_vectorizer(embedder: Embedder, config):
+    """Raise ValueError unless the collection embeds queries with the embedder's model"""
+    vectorizers = collection_vectorizers(config)
+    if not vectorizers or not all(embedder.matches_vectorizer(name, settings) for name, settings in vectorizers):
+        found = ", ".join(f"{name} {settings}" for name, settings in vectorizers) or "none"
+        raise ValueError(
+            f"Collection '{config.name}' vectorizes queries with {found}, not {embedder.model_id}: "
+            f"uploaded vectors would not be comparable. Create it with "
+            f"`python connect_and_collection.py --vectorizer openai` to use this embedder."
+        )
+
+class EmbeddingCache:
+    """On-disk vector cache keyed by (model id, text hash)"""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model_id TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model_id, text_hash))"
+        )
+
+    def get_many(self, model_id: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        # stay under SQLite's bound-parameter limit
+        for i in range(0, len(text_hashes), 500):
+            part = text_hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? "
+                f"AND text_hash IN ({','.join('?' * len(part))})",
+                [model_id, *part]
+            )
+            for text_hash, blob in rows:
+                found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model_id: str, vectors: Dict[str, List[float]]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text_hash, vector) VALUES (?, ?, ?)",
+                [(model_id, text_hash, array("f", vector).tobytes()) for text_hash, vector in vectors.items()]
+            )
+
+    def close(self):
+        self.conn.close()
+
+class CachedEmbedder:
+    """Embed through the cache, so only text never seen with this model reaches the embedder"""
+
+    def __init__(self, embedder: Embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model_id(self) -> str:
+        return self.embedder.model_id
+
+    def embed(self, texts: List[str], text_hashes: List[str]) -> List[List[float]]:
+        """Vectors for `texts`, where text_hashes[i] is the cache key of texts[i]"""
+        vectors = self.cache.get_many(self.model_id, list(set(text_hashes)))
+        cached = sum(1 for text_hash in text_hashes if text_hash in vectors)
+        self.hits += cached
+        self.misses += len(text_hashes) - cached
+
+        missing = {}
+        for text, text_hash in zip(texts, text_hashes):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+
+        if missing:
+            new_vectors = dict(zip(missing, self.embedder.embed(list(missing.values()))))
+            self.cache.put_many(self.model_id, new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[text_hash] for text_hash in text_hashes]
@@ -0,0 +1,200 @@
+"""Local stand-in for the parts of the Box API used by box_source.py.
+
+Serves a directory tree (one subfolder per tenant) as Box folders:
+
+    python fake_box_api.py --root data --port 8787
+    BOX_BASE_URL=http://localhost:8787 BOX_DEVELOPER_TOKEN=dev \\
+        BOX_TENANT_FOLDERS=<printed mapping> python data_to_weaviate.py --source box
+
+Files added, edited or removed on disk show up in the events stream the next
+time it is polled.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ROOT_FOLDER_ID = "0"
+PAGE_SIZE = 1000
+
+def stable_id(path: str) -> str:
+    """Numeric Box-style id derived from a relative path"""
+    return str(int(hashlib.sha1(path.encode("utf-8")).hexdigest()[:12], 16))
+
+def sha1_of(path: str) -> str:
+    hasher = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class FakeBox:
+    """Snapshot of the served tree plus an in-memory event log"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self.events = []
+        self.ids = {}  # {"folder/file name": file id} for files renamed through rename()
+        self.folders, self.files = self.scan()
+
+    def scan(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        folders, files = {}, {}
+        for name in sorted(os.listdir(self.root)):
+            folder_path = os.path.join(self.root, name)
+            if not os.path.isdir(folder_path):
+                continue
+            folder_id = stable_id(name)
+            folders[folder_id] = {"type": "folder", "id": folder_id, "name": name}
+            for file_name in sorted(os.listdir(folder_path)):
+                file_path = os.path.join(folder_path, file_name)
+                if not os.path.isfile(file_path):
+                    continue
+                stat = os.stat(file_path)
+                file_id = self.ids.get(f"{name}/{file_name}") or stable_id(f"{name}/{file_name}")
+                files[file_id] = {
+                    "type": "file",
+                    "id": file_id,
+                    "etag": "0",
+                    "name": file_name,
+                    "sha1": sha1_of(file_path),
+                    "size": stat.st_size,
+                    "modified_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+                    "parent": {"type": "folder", "id": folder_id, "name": name},
+                    "path": file_path,
+                }
+        return folders, files
+
+    def refresh_events(self):
+        """Rescan the tree and append upload/trash events for whatever changed"""
+        with self.lock:
+            folders, files = self.scan()
+            for file_id, info in files.items():
+                old = self.files.get(file_id)
+                if old is None or old["sha1"] != info["sha1"]:
+                    self.add_event("ITEM_UPLOAD", info)
+                elif old["name"] != info["name"]:
+                    self.add_event("ITEM_RENAME", info)
+            for file_id, info in self.files.items():
+                if file_id not in files:
+                    self.add_event("ITEM_TRASH", info)
+            self.folders, self.files = folders, files
+
+    def rename(self, folder: str, old_name: str, new_name: str):
+        """Rename a file on disk keeping its id, as a rename in Box does"""
+        with self.lock:
+            old_key = f"{folder}/{old_name}"
+            file_id = self.ids.pop(old_key, None) or stable_id(old_key)
+            os.rename(os.path.join(self.root, folder, old_name), os.path.join(self.root, folder, new_name))
+            self.ids[f"{folder}/{new_name}"] = file_id
+
+    def add_event(self, event_type: str, info: Dict):
+        self.events.append({
+            "type": "event",
+            "event_id": str(len(self.events) + 1),
+            "event_type": event_type,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "source": public(info),
+        })
+
+def public(info: Dict) -> Dict:
+    return {key: value for key, value in info.items() if key != "path"}
+
+def make_handler(box: FakeBox):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, payload, status: int = 200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def not_found(self):
+            self.send_json({"type": "error", "status": 404, "code": "not_found"}, 404)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split("/") if part]
+            if parts[:1] != ["2.0"]:
+                return self.not_found()
+            parts = parts[1:]
+
+            if parts[:1] == ["folders"] and len(parts) == 3 and parts[2] == "items":
+                return self.folder_items(parts[1], query)
+            if parts[:1] == ["files"] and len(parts) == 3 and parts[2] == "content":
+                return self.file_content(parts[1])
+            if parts == ["events"]:
+                return self.events(query)
+            return self.not_found()
+
+        def folder_items(self, folder_id: str, query: Dict):
+            if folder_id == ROOT_FOLDER_ID:
+                entries = list(box.folders.values())
+            elif folder_id in box.folders:
+                entries = [public(info) for info in box.files.values() if info["parent"]["id"] == folder_id]
+            else:
+                return self.not_found()
+
+            start = int(query.get("marker") or query.get("offset") or 0)
+            limit = min(int(query.get("limit", PAGE_SIZE)), PAGE_SIZE)
+            page = entries[start:start + limit]
+            more = start + limit < len(entries)
+            self.send_json({
+                "total_count": len(entries),
+                "entries": page,
+                "offset": start,
+                "limit": limit,
+                "next_marker": str(start + limit) if more else None,
+            })
+
+        def file_content(self, file_id: str):
+            info = box.files.get(file_id)
+            if info is None or not os.path.exists(info["path"]):
+                return self.not_found()
+            with open(info["path"], "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def events(self, query: Dict):
+            box.refresh_events()
+            position = query.get("stream_position", "now")
+            start = len(box.events) if position == "now" else int(position)
+            entries = box.events[start:start + int(query.get("limit", 100))]
+            self.send_json({
+                "chunk_size": len(entries),
+                "next_stream_position": start + len(entries),
+                "entries": entries,
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local folder tree as a fake Box API")
+    parser.add_argument("--root", default="data", help="Folder containing one subfolder per tenant")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    box = FakeBox(args.root)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(box))
+    mapping = ",".join(f"{info['name']}={folder_id}" for folder_id, info in box.folders.items())
+    print(f"Fake Box API on http://{args.host}:{args.port}")
+    print(f"BOX_TENANT_FOLDERS={mapping}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""In-process stand-in for the parts of the Weaviate collection API used by ingestion.
+
+Objects are kept in memory per tenant. Batch requests sleep for a configurable
+latency on a pool of `concurrent_requests` threads, like the real client
+sending requests in parallel, and can fail a fraction of objects so the retry
+path gets exercised.
+"""
+import random
+import threading
+import time
+import uuid as uuid_package
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+class FakeBatch:
+    def __init__(self, collection: "FakeTenantCollection", batch_size: int, concurrent_requests: int):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.pool = ThreadPoolExecutor(max_workers=concurrent_requests)
+        self.pending = []
+        self.futures = []
+
+    def __enter__(self):
+        self.collection.failed_objects = []
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+        for future in self.futures:
+            future.result()
+        self.pool.shutdown()
+
+    def add_object(self, properties: Dict, uuid: Optional[str] = None, vector: Optional[List[float]] = None):
+        self.pending.append(SimpleNamespace(
+            properties=properties,
+            uuid=str(uuid or uuid_package.uuid4()),
+            vector=vector,
+        ))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.futures.append(self.pool.submit(self.collection.send, self.pending))
+            self.pending = []
+
+class FakeBatchWrapper:
+    def __init__(self, collection: "FakeTenantCollection"):
+        self.collection = collection
+
+    def dynamic(self) -> FakeBatch:
+        return FakeBatch(self.collection, batch_size=100, concurrent_requests=2)
+
+    def fixed_size(self, batch_size: int = 100, concurrent_requests: int = 2) -> FakeBatch:
+        return FakeBatch(self.collection, batch_size, concurrent_requests)
+
+    @property
+    def failed_objects(self) -> List:
+        return list(self.collection.failed_objects)
+
+class FakeData:
+    def __init__(self, collection: "FakeTenantCollection"):
+        self.collection = collection
+
+    def delete_many(self, where) -> SimpleNamespace:
+        # Only the by-id filter ingestion uses: Filter.by_id().contains_any([...])
+        object_ids = [str(object_id) for object_id in where.value]
+        with self.collection.lock:
+            deleted = sum(self.collection.objects.pop(object_id, None) is not None for object_id in object_ids)
+        return SimpleNamespace(successful=deleted, failed=0, matches=deleted)
+
+class FakeTenantCollection:
+    def __init__(self, name: str, latency: float = 0.0, failure_rate: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.objects = {}
+        self.failed_objects = []
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(0)
+        self.batch = FakeBatchWrapper(self)
+        self.data = FakeData(self)
+
+    def send(self, objects: List[SimpleNamespace]):
+        """One batch request: wait `latency`, then store (or fail) every object"""
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            for obj in objects:
+                if self.random.random() < self.failure_rate:
+                    self.failed_objects.append(SimpleNamespace(object_=obj, message="simulated failure"))
+                else:
+                    self.objects[obj.uuid] = obj
+
+class FakeCollection:
+    """Multi-tenant collection: with_tenant() returns that tenant's in-memory store"""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.tenants = {}
+
+    def with_tenant(self, tenant: str) -> FakeTenantCollection:
+        if tenant not in self.tenants:
+            self.tenants[tenant] = FakeTenantCollection(tenant, self.latency, self.failure_rate)
+        return self.tenants[tenant]
+
+    def count(self) -> int:
+        return sum(len(tenant.objects) for tenant in self.tenants.values())
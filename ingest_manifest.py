@@ -0,0 +1,118 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+# Local record of what data_to_weaviate.py has already written to Weaviate
+MANIFEST_PATH = ".ingest_manifest.json"
+MANIFEST_VERSION = 2  # v2: chunks carry file/chunk metadata, older imports are re-sent
+
+class IngestManifest:
+    """Per tenant and file: the file hash, the chunk UUIDs stored for it and the
+    near-duplicate chunks dropped in favour of another (canonical) chunk"""
+
+    def __init__(self, path: str = MANIFEST_PATH, tenants: Optional[Dict[str, Dict]] = None):
+        self.path = path
+        # {tenant: {file_name: {"sha256": str | None, "chunks": [uuid, ...], "dropped": {uuid: canonical uuid}}}}
+        self.tenants = tenants or {}
+
+    @classmethod
+    def load(cls, path: str = MANIFEST_PATH) -> "IngestManifest":
+        """Load the manifest, or start an empty one if it does not exist yet"""
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"Ignoring manifest {path} written by an incompatible version")
+            return cls(path)
+        return cls(path, data.get("tenants", {}))
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half-written"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "tenants": self.tenants}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def files(self, tenant: str) -> List[str]:
+        return list(self.tenants.get(tenant, {}))
+
+    def get_file(self, tenant: str, file_name: str) -> Optional[Dict]:
+        return self.tenants.get(tenant, {}).get(file_name)
+
+    def set_file(self, tenant: str, file_name: str, sha256: Optional[str], chunk_ids: List[str],
+                 dropped: Optional[Dict[str, str]] = None):
+        """Record a file; pass sha256=None to force it to be re-checked next run"""
+        entry = {
+            "sha256": sha256,
+            "chunks": sorted(chunk_ids),
+        }
+        if dropped:
+            entry["dropped"] = dict(sorted(dropped.items()))
+        self.tenants.setdefault(tenant, {})[file_name] = entry
+
+    def recheck_dropped(self, tenant: str, removed_ids: Iterable[str]) -> List[str]:
+        """Mark files with chunks dropped in favour of a removed chunk for re-checking next run"""
+        removed_ids = set(removed_ids)
+        files = []
+        for file_name, entry in self.tenants.get(tenant, {}).items():
+            if removed_ids.intersection(entry.get("dropped", {}).values()):
+                entry["sha256"] = None
+                files.append(file_name)
+        return files
+
+    def remove_file(self, tenant: str, file_name: str):
+        self.tenants.get(tenant, {}).pop(file_name, None)
+
+CHECKPOINT_PATH = ".ingest_checkpoint.jsonl"
+
+class IngestCheckpoint:
+    """Append-only log of confirmed upload batches, one line per tenant/file/batch.
+
+    It covers the run in progress: the manifest is only saved once a tenant
+    finishes, so after a crash `--resume` uses this log to skip objects that
+    already landed.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH, resume: bool = False):
+        self.path = path
+        self.confirmed = {}  # {tenant: set of uuids}
+        self.next_batch = {}  # {tenant: next batch number}
+
+        if resume and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn last line from a crash
+                    tenant = record["tenant"]
+                    self.confirmed.setdefault(tenant, set()).update(record["uuids"])
+                    self.next_batch[tenant] = max(self.next_batch.get(tenant, 0), record["batch"] + 1)
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def confirmed_ids(self, tenant: str) -> set:
+        return self.confirmed.get(tenant, set())
+
+    def record(self, tenant: str, objects: List[Dict]):
+        """Log a confirmed batch of objects, grouped by source file"""
+        batch = self.next_batch.get(tenant, 0)
+        self.next_batch[tenant] = batch + 1
+
+        by_file = {}
+        for obj in objects:
+            by_file.setdefault(obj["properties"]["file_name"], []).append(str(obj["uuid"]))
+        for file_name, uuids in by_file.items():
+            self.file.write(json.dumps({"tenant": tenant, "file": file_name, "batch": batch, "uuids": uuids}) + "\n")
+            self.confirmed.setdefault(tenant, set()).update(uuids)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def clear(self):
+        """Drop the log once the run has finished and the manifest is saved"""
+        self.file.close()
+        os.remove(self.path)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
@@ -0,0 +1,99 @@
+"""Prometheus metrics for the search API, served on GET /metrics.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so the scrape aggregates every worker. Cache stats are read at
+scrape time in-process, so they still describe only the worker that answered.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+from request_timing import add_phase
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_LATENCY = Histogram(
+    "search_api_request_seconds", "HTTP request latency (to first byte for streams)",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "search_api_requests_in_flight", "Requests being handled", ["endpoint"], multiprocess_mode="livesum",
+)
+RESPONSE_BYTES = Histogram(
+    "search_api_response_bytes", "Response body size", ["endpoint"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+SEARCH_LATENCY = Histogram(
+    "search_api_search_seconds", "Search latency including caches", ["search_type", "tenant"],
+    buckets=LATENCY_BUCKETS,
+)
+SEARCH_RESULTS = Histogram(
+    "search_api_search_results", "Documents returned per search", ["search_type"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+UPSTREAM_LATENCY = Histogram(
+    "search_api_upstream_seconds", "Time in Weaviate, the LLM and the query agent", ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "search_api_upstream_errors_total", "Upstream calls that raised", ["operation"],
+)
+FALLBACKS = Counter(
+    "search_api_fallbacks_total", "Degraded answers, e.g. a generative search without a generated answer", ["kind"],
+)
+
+@contextmanager
+def track(operation: str):
+    """Time an upstream call (histogram and Server-Timing phase); count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.labels(operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_LATENCY.labels(operation).observe(elapsed)
+        add_phase(operation, elapsed)
+
+class StatsCollector:
+    """Exposes the numeric fields of a stats() dict as gauges at scrape time"""
+
+    def __init__(self, name: str, stats: Callable[[], Dict]):
+        self.name = name
+        self.stats = stats
+
+    def collect(self):
+        for key, value in self.stats().items():
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    yield from self._gauge(f"{key}_{sub_key}", sub_value)
+            else:
+                yield from self._gauge(key, value)
+
+    def _gauge(self, key: str, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield GaugeMetricFamily(f"search_api_{self.name}_{key}", f"{self.name} stats: {key}", value=value)
+
+# Also added to the per-scrape registry in multiprocess mode, which does not read REGISTRY
+STATS_COLLECTORS: List[StatsCollector] = []
+
+def register_stats(name: str, stats: Callable[[], Dict]):
+    collector = StatsCollector(name, stats)
+    STATS_COLLECTORS.append(collector)
+    REGISTRY.register(collector)
+
+def render_metrics():
+    """(body, content type) for the /metrics endpoint"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in STATS_COLLECTORS:
+            registry.register(collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
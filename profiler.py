@@ -0,0 +1,106 @@
+"""Opt-in sampling profiler for slow requests.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE or, with
+PROFILE_ALLOW_HEADER=1 (off by default: any client could then force
+profiles), when it sends `X-Profile: 1`. A background thread samples the event
+loop thread's stack every PROFILE_INTERVAL_MS; if the request took at least
+PROFILE_SLOW_MS (always, for header requests) the samples are written in
+collapsed-stack format to PROFILE_DIR, ready for flamegraph.pl or speedscope.
+Only the newest PROFILE_MAX_FILES profiles are kept:
+
+    flamegraph.pl .cache/profiles/<file>.folded > slow.svg
+
+The loop thread runs every concurrent request, so a profile also shows the
+work of requests that overlapped with the profiled one.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(".cache", "profiles"))
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # share of requests, 0..1
+PROFILE_ALLOW_HEADER = os.getenv('PROFILE_ALLOW_HEADER', '0') == '1'
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))  # oldest profiles are deleted beyond this
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 500))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+MAX_CONCURRENT_PROFILES = 2
+
+_active = threading.BoundedSemaphore(MAX_CONCURRENT_PROFILES)
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Counts collapsed stacks of one thread, sampled from a daemon thread"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+def maybe_start(force: bool) -> Optional[SamplingProfiler]:
+    """Profiler for this request if it is opted in or sampled and a slot is free"""
+    if not (force or (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE)):
+        return None
+    if not _active.acquire(blocking=False):
+        return None
+    return SamplingProfiler(threading.get_ident()).start()
+
+def finish(profiler: SamplingProfiler, label: str, elapsed: float, force: bool) -> Optional[str]:
+    """Stop sampling; write the stacks if the request was slow (or forced). Returns the file path"""
+    try:
+        stacks = profiler.stop()
+    finally:
+        _active.release()
+    if not stacks or (not force and elapsed * 1000 < PROFILE_SLOW_MS):
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "root"
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{name}-{elapsed * 1000:.0f}ms.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    prune_profiles(PROFILE_MAX_FILES)
+    return path
+
+def prune_profiles(max_files: int):
+    """Delete the oldest profiles in PROFILE_DIR beyond `max_files`"""
+    paths = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.name.endswith(".folded"):
+            try:
+                paths.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass  # pruned by another worker
+    for _, path in sorted(paths)[:max(len(paths) - max_files, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
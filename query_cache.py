@@ -0,0 +1,155 @@
+"""Result cache for repeated searches.
+
+Entries live in a per-process LRU bounded by count and bytes, with a TTL.
+Set QUERY_CACHE_REDIS_URL (and `pip install redis`) to also share them
+between uvicorn workers. Keys embed the tenant's version from
+tenant_versions.py, so results cached before a re-index are never served.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from serialization import dumps_json, loads_json
+from tenant_versions import TenantVersions
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', 300))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 2048))
+QUERY_CACHE_MAX_BYTES = int(float(os.getenv('QUERY_CACHE_MAX_MB', 64)) * 1024 * 1024)
+QUERY_CACHE_REDIS_URL = os.getenv('QUERY_CACHE_REDIS_URL')
+
+class RedisCacheBackend:
+    """Shared second level; entries expire server-side after the TTL"""
+
+    def __init__(self, url: str, prefix: str = "query-cache:"):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.redis.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    async def close(self):
+        await self.redis.aclose()
+
+class QueryCache:
+    """LRU + TTL cache of JSON-serializable results, bounded in entries and bytes"""
+
+    def __init__(self, versions: Optional[TenantVersions] = None,
+                 max_entries: int = QUERY_CACHE_MAX_ENTRIES, max_bytes: int = QUERY_CACHE_MAX_BYTES,
+                 ttl: float = QUERY_CACHE_TTL, backend: Optional[RedisCacheBackend] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.versions = versions or TenantVersions()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self.clock = clock
+        # {key: (expires_at, payload)}, least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, namespace: str, tenant: str, params: Dict) -> str:
+        """Key for one request; changes whenever the tenant is re-indexed"""
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{namespace}:{tenant}:v{self.versions.get(tenant)}:{digest}"
+
+    async def get(self, key: str) -> Optional[Dict]:
+        payload = self._get_local(key)
+        if payload is not None:
+            self.hits += 1
+            return loads_json(payload)
+
+        if self.backend:
+            try:
+                payload = await self.backend.get(key)
+            except Exception as e:
+                logger.warning(f"Shared query cache unavailable: {e}")
+                payload = None
+            if payload is not None:
+                self.shared_hits += 1
+                self._set_local(key, payload)
+                return loads_json(payload)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict):
+        payload = dumps_json(value)
+        self._set_local(key, payload)
+        if self.backend:
+            try:
+                await self.backend.set(key, payload, self.ttl)
+            except Exception as e:
+                logger.warning(f"Shared query cache unavailable: {e}")
+
+    def _get_local(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if self.clock() >= expires_at:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def _set_local(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self.clock() + self.ttl, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "shared": self.backend is not None,
+        }
+
+    async def close(self):
+        if self.backend:
+            await self.backend.close()
+
+def create_query_cache(versions: Optional[TenantVersions] = None) -> QueryCache:
+    """Cache configured from the QUERY_CACHE_* environment variables"""
+    backend = None
+    if QUERY_CACHE_REDIS_URL:
+        try:
+            backend = RedisCacheBackend(QUERY_CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("QUERY_CACHE_REDIS_URL is set but redis is not installed; caching per process only")
+    return QueryCache(versions, backend=backend)
@@ -0,0 +1,66 @@
+"""Per-request phase timings, reported in the Server-Timing response header.
+
+The middleware opens a timing scope per request; code anywhere below it
+adds phases with `phase(name)` (metrics.track does this for every upstream
+call). Phases that repeat, or run concurrently as in federated search, are
+summed.
+"""
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.routing import APIRoute
+
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+def start_request() -> Dict[str, float]:
+    """New phase dict for this request; set it before call_next so the handler task shares it"""
+    phases = {}
+    _phases.set(phases)
+    return phases
+
+def add_phase(name: str, seconds: float):
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, time.perf_counter() - start)
+
+def server_timing_header(phases: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+class TimedRoute(APIRoute):
+    """Times the endpoint function and, separately, the validation and serialization around it"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **endpoint_kwargs):
+            with phase("endpoint"):
+                return await endpoint(*args, **endpoint_kwargs)
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                phases = _phases.get()
+                if phases is not None:
+                    elapsed = time.perf_counter() - start
+                    phases["serialize"] = phases.get("serialize", 0.0) + max(0.0, elapsed - phases.get("endpoint", 0.0))
+
+        return timed_handler
@@ -1,38 +1,37 @@
 import streamlit as st
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from weaviate.classes.generate import GenerativeConfig
-from config import DEFAULT_TENANTS, WEAVIATE_URL, WEAVIATE_API_KEY
+from weaviate.classes.query import Filter, MetadataQuery
+from config import DEFAULT_TENANTS, DOCUMENTS_PAGE_SIZE, WEAVIATE_URL, WEAVIATE_API_KEY
+from data_models import (DOCUMENT_PROPERTIES, DUPLICATE_OVERFETCH, collapse_duplicates, document_from_object,
+                         missing_canonicals)
+from tenant_versions import create_tenant_versions
 
 logger = logging.getLogger(__name__)
 
+tenant_versions = create_tenant_versions()
+
+@st.cache_resource(validate=lambda client: client.is_connected())
+def _shared_weaviate_client():
+    """One client per Streamlit server process, opened on first use and reused across reruns"""
+    import weaviate
+    from weaviate.auth import AuthApiKey
+
+    from weaviate_connection import get_inference_headers
+
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=WEAVIATE_URL,
+        auth_credentials=AuthApiKey(WEAVIATE_API_KEY),
+        headers=get_inference_headers(),
+    )
+
 def get_weaviate_client():
-    """Get a fresh Weaviate client connection"""
+    """Get the shared Weaviate client (connects lazily; failures are not cached)"""
     try:
-        import weaviate
-        from weaviate.auth import AuthApiKey
-        
-        headers = {}
-        
-        # Add API keys to headers
-        from config import ANTHROPIC_API_KEY, OPENAI_API_KEY
-        if OPENAI_API_KEY:
-            headers["X-INFERENCE-PROVIDER-API-KEY"] = OPENAI_API_KEY
-        elif ANTHROPIC_API_KEY:
-            headers["X-INFERENCE-PROVIDER-API-KEY"] = ANTHROPIC_API_KEY
-        
-        if ANTHROPIC_API_KEY:
-            headers["X-Anthropic-Api-Key"] = ANTHROPIC_API_KEY
-        if OPENAI_API_KEY:
-            headers["X-OpenAI-Api-Key"] = OPENAI_API_KEY
-
-        client = weaviate.connect_to_weaviate_cloud(
-            cluster_url=WEAVIATE_URL,
-            auth_credentials=AuthApiKey(WEAVIATE_API_KEY),
-            headers=headers,
-        )
-        return client
+        return _shared_weaviate_client()
     except Exception as e:
         logger.error(f"Failed to connect to Weaviate: {e}")
         st.error(f"Failed to connect to Weaviate: {str(e)}")
@@ -46,51 +45,40 @@ def get_anthropic_generative_config():
         temperature=0.7,
     )
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def fetch_tenants() -> List[Dict]:
     """Fetch available tenants from Weaviate"""
-    client = None
+    versions = tenant_versions.all()
+    # A tenant bumped by data_to_weaviate.py changes the cache key, so its counts are refetched
+    return _fetch_tenant_counts(tuple(versions.get(name, 0) for name in DEFAULT_TENANTS))
+
+def _count_tenant(docs, tenant_name: str) -> Dict:
+    try:
+        result = docs.with_tenant(tenant_name).aggregate.over_all(total_count=True)
+        logger.info(f"Found {result.total_count} documents for tenant {tenant_name}")
+        return {"name": tenant_name, "document_count": result.total_count}
+    except Exception as e:
+        logger.warning(f"Error counting documents for tenant {tenant_name}: {e}")
+        return {"name": tenant_name, "document_count": 0}
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def _fetch_tenant_counts(versions: tuple) -> List[Dict]:
+    """Server-side counts for every tenant, queried in parallel"""
     try:
         client = get_weaviate_client()
         if not client:
             return []
             
         docs = client.collections.get("Documents")
-        tenants = DEFAULT_TENANTS
-        
-        tenant_info = []
-        for tenant_name in tenants:
-            try:
-                tenant_collection = docs.with_tenant(tenant_name)
-                result = tenant_collection.query.fetch_objects(limit=1000)
-                tenant_info.append({
-                    "name": tenant_name,
-                    "document_count": len(result.objects)
-                })
-                logger.info(f"Found {len(result.objects)} documents for tenant {tenant_name}")
-            except Exception as e:
-                logger.warning(f"Error fetching documents for tenant {tenant_name}: {e}")
-                tenant_info.append({
-                    "name": tenant_name,
-                    "document_count": 0
-                })
-        
-        return tenant_info
+        with ThreadPoolExecutor(max_workers=len(DEFAULT_TENANTS)) as pool:
+            return list(pool.map(lambda name: _count_tenant(docs, name), DEFAULT_TENANTS))
     except Exception as e:
         logger.error(f"Error in fetch_tenants: {e}")
         st.error(f"Error fetching tenants: {str(e)}")
         return []
-    finally:
-        if client:
-            try:
-                client.close()
-            except:
-                pass
 
 @st.cache_data(ttl=300)
-def fetch_documents(tenant: str) -> List[Dict]:
-    """Fetch documents for a specific tenant"""
-    client = None
+def fetch_documents(tenant: str, after: Optional[str] = None, limit: int = DOCUMENTS_PAGE_SIZE) -> List[Dict]:
+    """Fetch one page of documents for a tenant, starting after the `after` UUID"""
     try:
         client = get_weaviate_client()
         if not client:
@@ -99,18 +87,13 @@ def fetch_documents(tenant: str) -> List[Dict]:
         docs = client.collections.get("Documents")
         tenant_collection = docs.with_tenant(tenant)
         
-        result = tenant_collection.query.fetch_objects(limit=50)
+        result = tenant_collection.query.fetch_objects(
+            limit=limit,
+            after=after,
+            return_properties=DOCUMENT_PROPERTIES
+        )
         
-        documents = []
-        for i, obj in enumerate(result.objects):
-            properties = obj.properties or {}
-            documents.append({
-                "id": str(obj.uuid),
-                "content": properties.get("content", "No content available"),
-                "file_name": f"Document_{i+1}",
-                "chunk_index": i,
-                "created_date": "2024-01-01",
-            })
+        documents = [document_from_object(obj) for obj in result.objects]
         
         logger.info(f"Retrieved {len(documents)} documents for tenant {tenant}")
         return documents
@@ -118,16 +101,26 @@ def fetch_documents(tenant: str) -> List[Dict]:
         logger.error(f"Error in fetch_documents for tenant {tenant}: {e}")
         st.error(f"Error fetching documents: {str(e)}")
         return []
-    finally:
-        if client:
-            try:
-                client.close()
-            except:
-                pass
+
+SEARCH_LIMIT = 20
+FALLBACK_LIMIT = 10  # hybrid results shown when generation fails
+
+def collapse_hits(tenant_collection, result, limit: int) -> List[Dict]:
+    """Top `limit` hits with linked near-duplicates collapsed onto their canonical chunk"""
+    hits = [document_from_object(obj) for obj in result.objects]
+    canonicals = {}
+    missing = missing_canonicals(hits, limit)
+    if missing:
+        fetched = tenant_collection.query.fetch_objects(
+            filters=Filter.by_id().contains_any(missing),
+            limit=len(missing),
+            return_properties=DOCUMENT_PROPERTIES
+        )
+        canonicals = {str(obj.uuid): document_from_object(obj) for obj in fetched.objects}
+    return collapse_duplicates(hits, limit, canonicals)
 
 def search_documents(query: str, tenant: str, search_type: str, alpha: float = 0.5) -> Dict:
     """Search documents using various search types"""
-    client = None
     try:
         client = get_weaviate_client()
         if not client:
@@ -142,20 +135,26 @@ def search_documents(query: str, tenant: str, search_type: str, alpha: float = 0
         if search_type == "keyword":
             result = tenant_collection.query.bm25(
                 query=query,
-                limit=20
+                limit=SEARCH_LIMIT * DUPLICATE_OVERFETCH,
+                return_properties=DOCUMENT_PROPERTIES,
+                return_metadata=MetadataQuery(score=True)
             )
             
         elif search_type == "vector":
             result = tenant_collection.query.near_text(
                 query=query,
-                limit=20
+                limit=SEARCH_LIMIT * DUPLICATE_OVERFETCH,
+                return_properties=DOCUMENT_PROPERTIES,
+                return_metadata=MetadataQuery(distance=True)
             )
             
         elif search_type == "hybrid":
             result = tenant_collection.query.hybrid(
                 query=query,
                 alpha=alpha,
-                limit=20
+                limit=SEARCH_LIMIT * DUPLICATE_OVERFETCH,
+                return_properties=DOCUMENT_PROPERTIES,
+                return_metadata=MetadataQuery(score=True)
             )
             
         elif search_type == "generative":
@@ -187,20 +186,12 @@ def search_documents(query: str, tenant: str, search_type: str, alpha: float = 0
                     result = tenant_collection.query.hybrid(
                         query=query,
                         alpha=0.5,
-                        limit=10
+                        limit=FALLBACK_LIMIT * DUPLICATE_OVERFETCH,
+                        return_properties=DOCUMENT_PROPERTIES,
+                        return_metadata=MetadataQuery(score=True)
                     )
                     
-                    documents = []
-                    for i, obj in enumerate(result.objects):
-                        properties = obj.properties or {}
-                        documents.append({
-                            "id": str(obj.uuid),
-                            "content": properties.get("content", "No content available"),
-                            "file_name": f"Search_Result_{i+1}",
-                            "chunk_index": i,
-                            "created_date": "2024-01-01",
-                            "score": getattr(obj, 'score', None)
-                        })
+                    documents = collapse_hits(tenant_collection, result, FALLBACK_LIMIT)
                 
                 logger.info(f"Generative search completed: {len(documents)} results")
                 return {
@@ -217,20 +208,12 @@ def search_documents(query: str, tenant: str, search_type: str, alpha: float = 0
                     result = tenant_collection.query.hybrid(
                         query=query,
                         alpha=0.5,
-                        limit=10
+                        limit=FALLBACK_LIMIT * DUPLICATE_OVERFETCH,
+                        return_properties=DOCUMENT_PROPERTIES,
+                        return_metadata=MetadataQuery(score=True)
                     )
                     
-                    documents = []
-                    for i, obj in enumerate(result.objects):
-                        properties = obj.properties or {}
-                        documents.append({
-                            "id": str(obj.uuid),
-                            "content": properties.get("content", "No content available"),
-                            "file_name": f"Search_Result_{i+1}",
-                            "chunk_index": i,
-                            "created_date": "2024-01-01",
-                            "score": getattr(obj, 'score', None)
-                        })
+                    documents = collapse_hits(tenant_collection, result, FALLBACK_LIMIT)
                     
                     return {
                         "documents": documents,
@@ -247,16 +230,7 @@ def search_documents(query: str, tenant: str, search_type: str, alpha: float = 0
             st.error("Invalid search type")
             return {}
         
-        for i, obj in enumerate(result.objects):
-            properties = obj.properties or {}
-            documents.append({
-                "id": str(obj.uuid),
-                "content": properties.get("content", "No content available"),
-                "file_name": f"Search_Result_{i+1}",
-                "chunk_index": i,
-                "created_date": "2024-01-01",
-                "score": getattr(obj, 'score', None)
-            })
+        documents = collapse_hits(tenant_collection, result, SEARCH_LIMIT)
         
         logger.info(f"Search completed: {len(documents)} results for query '{query}'")
         return {
@@ -270,16 +244,9 @@ def search_documents(query: str, tenant: str, search_type: str, alpha: float = 0
         logger.error(f"Error in search_documents: {e}")
         st.error(f"Search error: {str(e)}")
         return {}
-    finally:
-        if client:
-            try:
-                client.close()
-            except:
-                pass
 
 def query_agent(query: str, tenant: str) -> Dict:
     """Use AI agent for complex queries"""
-    client = None
     try:
         client = get_weaviate_client()
         if not client:
@@ -298,7 +265,7 @@ def query_agent(query: str, tenant: str) -> Dict:
         cfg = QueryAgentCollectionConfig(
             name=collection_name,
             tenant=tenant,
-            view_properties=["content", "file_name", "created_date"]
+            view_properties=DOCUMENT_PROPERTIES
         )
 
         response = agent.run(
@@ -335,12 +302,6 @@ def query_agent(query: str, tenant: str) -> Dict:
         logger.error(f"Error in query_agent: {e}")
         st.error(f"Query Agent error: {str(e)}")
         return {}
-    finally:
-        if client:
-            try:
-                client.close()
-            except:
-                pass
 
 def filter_documents_locally(documents: List[Dict], filter_text: str) -> List[Dict]:
     """Filter documents locally by content"""
@@ -0,0 +1,189 @@
+"""Semantic cache for generated answers.
+
+A query is embedded and compared against the queries already answered for
+the same tenant; above SEMANTIC_CACHE_THRESHOLD cosine similarity the stored
+answer and sources are returned. Each tenant's entries are dropped as soon
+as its version in tenant_versions.py changes.
+
+The cache needs a semantic embedder (OpenAI, when OPENAI_API_KEY is set) and
+is disabled otherwise: a bag-of-words vector scores "after five years" and
+"after two years" as the same question.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import DEFAULT_TENANTS
+from embeddings import Embedder, get_embedder
+from tenant_versions import TenantVersions
+
+logger = logging.getLogger(__name__)
+
+# OpenAI embeddings when a key is set; without one the cache is off
+SEMANTIC_CACHE_EMBEDDER = os.getenv('SEMANTIC_CACHE_EMBEDDER') or ("openai" if os.getenv('OPENAI_API_KEY') else None)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 1024))  # per tenant and kind
+SEMANTIC_CACHE_MAX_INDEXES = int(os.getenv('SEMANTIC_CACHE_MAX_INDEXES', 16))  # (kind, tenant) pairs kept
+SEMANTIC_CACHE_TTL = float(os.getenv('SEMANTIC_CACHE_TTL', 3600))
+INITIAL_ROWS = 16  # rows allocated for a new index; doubled as it fills, up to max_entries
+
+class _VectorIndex:
+    """Matrix of unit vectors with their payloads, grown by doubling up to `capacity` rows"""
+
+    def __init__(self, dimensions: int, capacity: int, version: int):
+        self.version = version
+        self.capacity = capacity
+        rows = min(INITIAL_ROWS, capacity)
+        self.vectors = np.zeros((rows, dimensions), dtype=np.float32)
+        self.used = np.zeros(rows, dtype=bool)
+        self.expires_at = np.zeros(rows)
+        self.last_used = np.zeros(rows)
+        self.payloads: List[Optional[Tuple[str, Dict]]] = [None] * rows
+
+    def grow(self) -> Optional[int]:
+        """First new row after growing, or None at capacity"""
+        rows = len(self.used)
+        if rows >= self.capacity:
+            return None
+        extra = min(rows * 2, self.capacity) - rows
+        self.vectors = np.vstack([self.vectors, np.zeros((extra, self.vectors.shape[1]), dtype=np.float32)])
+        self.used = np.concatenate([self.used, np.zeros(extra, dtype=bool)])
+        self.expires_at = np.concatenate([self.expires_at, np.zeros(extra)])
+        self.last_used = np.concatenate([self.last_used, np.zeros(extra)])
+        self.payloads.extend([None] * extra)
+        return rows
+
+class SemanticCache:
+    """Nearest previously answered query per (kind, tenant), searched with one matrix product.
+
+    Without an embedder every lookup misses and nothing is stored. Indexes are
+    created only when storing for one of `tenants` (any tenant if None), and
+    the least recently used index is dropped beyond `max_indexes`.
+    """
+
+    def __init__(self, embedder: Optional[Embedder], versions: Optional[TenantVersions] = None,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+                 ttl: float = SEMANTIC_CACHE_TTL, clock: Callable[[], float] = time.monotonic,
+                 tenants: Optional[Iterable[str]] = None, max_indexes: int = SEMANTIC_CACHE_MAX_INDEXES):
+        self.embedder = embedder
+        self.versions = versions or TenantVersions()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.tenants = set(tenants) if tenants is not None else None
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[Tuple[str, str], _VectorIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.embedder is not None
+
+    async def embed(self, query: str) -> Optional[np.ndarray]:
+        """Unit vector for a query, or None if disabled or the embedder fails (the cache is then skipped)"""
+        if self.embedder is None:
+            return None
+        try:
+            vectors = await asyncio.to_thread(self.embedder.embed, [query])
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        vector = np.asarray(vectors[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _current_index(self, kind: str, tenant: str, dimensions: int) -> Optional[_VectorIndex]:
+        """The (kind, tenant) index if it exists and is current; a stale one is dropped"""
+        index = self._indexes.get((kind, tenant))
+        if index is None:
+            return None
+        if index.version != self.versions.get(tenant) or index.vectors.shape[1] != dimensions:
+            self.invalidations += 1
+            del self._indexes[(kind, tenant)]
+            return None
+        self._indexes.move_to_end((kind, tenant))
+        return index
+
+    def get(self, kind: str, tenant: str, vector: Optional[np.ndarray]) -> Optional[Tuple[str, Dict, float]]:
+        """(matched query, stored value, similarity) for the closest live entry above the threshold"""
+        if vector is None:
+            return None
+        index = self._current_index(kind, tenant, len(vector))
+        if index is None:
+            self.misses += 1
+            return None
+        now = self.clock()
+        scores = index.vectors @ vector
+        scores[~index.used | (index.expires_at <= now)] = -np.inf
+        slot = int(np.argmax(scores))
+        if scores[slot] < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        index.last_used[slot] = now
+        query, value = index.payloads[slot]
+        return query, value, float(scores[slot])
+
+    def set(self, kind: str, tenant: str, vector: Optional[np.ndarray], query: str, value: Dict):
+        if vector is None or (self.tenants is not None and tenant not in self.tenants):
+            return
+        index = self._current_index(kind, tenant, len(vector))
+        if index is None:
+            index = _VectorIndex(len(vector), self.max_entries, self.versions.get(tenant))
+            self._indexes[(kind, tenant)] = index
+            if len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        now = self.clock()
+        free = np.flatnonzero(~index.used | (index.expires_at <= now))
+        if len(free):
+            slot = int(free[0])
+        else:
+            slot = index.grow()
+            if slot is None:
+                slot = int(np.argmin(index.last_used))
+                self.evictions += 1
+        index.vectors[slot] = vector
+        index.used[slot] = True
+        index.expires_at[slot] = now + self.ttl
+        index.last_used[slot] = now
+        index.payloads[slot] = (query, value)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": int(sum(index.used.sum() for index in self._indexes.values())),
+            "indexes": len(self._indexes),
+            "threshold": self.threshold,
+            "enabled": self.enabled,
+            "embedder": self.embedder.model_id if self.embedder else None,
+        }
+
+def create_semantic_cache(versions: Optional[TenantVersions] = None) -> SemanticCache:
+    """Cache configured from the SEMANTIC_CACHE_* environment variables; disabled without a semantic embedder"""
+    embedder = None
+    if SEMANTIC_CACHE_EMBEDDER:
+        try:
+            embedder = get_embedder(SEMANTIC_CACHE_EMBEDDER)
+        except ValueError as e:
+            logger.warning(f"Semantic cache disabled: {e}")
+        else:
+            if not embedder.semantic:
+                logger.warning(f"Semantic cache disabled: {embedder.model_id} does not capture meaning")
+                embedder = None
+    if embedder is None:
+        logger.info("Semantic cache disabled (set OPENAI_API_KEY or SEMANTIC_CACHE_EMBEDDER=openai)")
+    return SemanticCache(embedder, versions, tenants=DEFAULT_TENANTS)
@@ -0,0 +1,58 @@
+"""Fast encoding of search payloads, negotiated from the Accept header.
+
+Search results travel through the API as plain dicts and are encoded once:
+with orjson when it is installed (pydantic-core's encoder otherwise), or as
+MessagePack for clients sending `Accept: application/msgpack`. Both are
+optional dependencies; without msgpack, clients asking for it get JSON.
+"""
+from typing import Any, Tuple
+
+from fastapi import Request, Response
+from pydantic_core import from_json, to_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+def dumps_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return to_json(payload)
+
+def loads_json(payload: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return from_json(payload)
+
+def dumps_msgpack(payload: Any) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
+
+def wants_msgpack(accept: str) -> bool:
+    """True if the Accept header lists MessagePack (q=0 entries excluded) and msgpack is installed"""
+    if msgpack is None or not accept:
+        return False
+    for entry in accept.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if media_type.lower() in MSGPACK_MEDIA_TYPES:
+            return not any(param.replace(" ", "") in ("q=0", "q=0.0") for param in params)
+    return False
+
+def encode(payload: Any, accept: str = "") -> Tuple[bytes, str]:
+    """(body, media type) of the payload in the format the client accepts"""
+    if wants_msgpack(accept):
+        return dumps_msgpack(payload), MSGPACK_MEDIA_TYPE
+    return dumps_json(payload), JSON_MEDIA_TYPE
+
+def negotiated_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    body, media_type = encode(payload, request.headers.get("accept", ""))
+    return Response(content=body, status_code=status_code, media_type=media_type, headers={"Vary": "Accept"})
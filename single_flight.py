@@ -0,0 +1,57 @@
+"""Coalesce concurrent identical calls into one upstream call.
+
+The first caller for a key starts the call; callers arriving while it is in
+flight await the same task and get the same result or exception. Each waiter
+gives up after its own timeout without cancelling the shared call, so a slow
+answer still completes (and lands in the caches) for whoever is left.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', 60))  # seconds a waiter waits
+
+class SingleFlight:
+    def __init__(self, timeout: Optional[float] = SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Result of fn(), shared with every concurrent caller using the same key"""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+
+        try:
+            # shield: a waiter timing out or disconnecting must not cancel the call for the others
+            return await asyncio.wait_for(asyncio.shield(task), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            if not task.done():
+                self.timeouts += 1
+            raise
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter already gave up
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight call {key} failed: {task.exception()}")
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "in_flight": len(self._in_flight),
+        }
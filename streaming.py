@@ -0,0 +1,70 @@
+"""Server-Sent Events helpers and token streaming from the Anthropic Messages API.
+
+Weaviate's generative module only returns finished answers, so streamed
+answers call the model directly with the same settings.
+"""
+import json
+import os
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_APIKEY')
+ANTHROPIC_MESSAGES_URL = "https://api.anthropic.com/v1/messages"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Stop proxies (nginx) from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class AnthropicStreamer:
+    """Streams completion text deltas over one pooled HTTP client"""
+
+    def __init__(self, model: str, max_tokens: int, temperature: float,
+                 api_key: Optional[str] = ANTHROPIC_API_KEY):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.api_key = api_key
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(60, connect=10))
+        async with self._client.stream(
+            "POST", ANTHROPIC_MESSAGES_URL,
+            headers={
+                "x-api-key": self.api_key,
+                "anthropic-version": ANTHROPIC_VERSION,
+            },
+            json={
+                "model": self.model,
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+                "stream": True,
+                "messages": [{"role": "user", "content": prompt}],
+            },
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                    yield event["delta"]["text"]
+                elif event.get("type") == "error":
+                    raise RuntimeError(event.get("error", {}).get("message", "Anthropic stream error"))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
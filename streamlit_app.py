@@ -13,8 +13,8 @@ from search_functions import (
     fetch_tenants, fetch_documents, search_documents, 
     query_agent, filter_documents_locally
 )
-from connect_and_collection import weaviate_client
-from config import APP_TITLE, APP_ICON
+from config import APP_TITLE, APP_ICON, DOCUMENTS_PAGE_SIZE
+from data_models import make_snippet
 
 # Load environment variables from .env file
 load_dotenv()
@@ -127,6 +127,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def next_cursor(page):
+    """UUID to continue after, or None once a short page shows the tenant is exhausted"""
+    return page[-1]['id'] if len(page) == DOCUMENTS_PAGE_SIZE else None
+
 def main():
     st.markdown('<h1 class="main-header">🔍 Weaviate Enterprise Search</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #666;">Advanced Search & AI-Powered Document Discovery</p>', unsafe_allow_html=True)
@@ -137,6 +141,8 @@ def main():
         st.session_state.search_results = None
     if 'all_documents' not in st.session_state:
         st.session_state.all_documents = []
+    if 'documents_cursor' not in st.session_state:
+        st.session_state.documents_cursor = None
     if 'current_view' not in st.session_state:
         st.session_state.current_view = "documents"
     
@@ -229,6 +235,7 @@ def main():
                         st.session_state.search_results = None
                         st.session_state.current_view = "documents"
                         st.session_state.all_documents = fetch_documents(tenant['name'])
+                        st.session_state.documents_cursor = next_cursor(st.session_state.all_documents)
                         st.rerun()
         else:
             st.error("Unable to fetch tenants. Please check your API connection.")
@@ -238,7 +245,7 @@ def main():
             st.success(f"✅ Selected: **{st.session_state.selected_tenant}**")
             
             documents = st.session_state.all_documents
-            st.metric("Total Documents", len(documents))
+            st.metric("Loaded Documents", len(documents))
             
             view_icons = {
                 "documents": "📄",
@@ -276,14 +283,17 @@ def main():
                         </div>
                         """, unsafe_allow_html=True)
                     else:
-                        # Truncate regular documents
+                        # Highlighted snippet on the card, the full chunk on demand
+                        snippet = make_snippet(doc['content'], st.session_state.search_results['query'])
                         st.markdown(f"""
                         <div class="document-card">
                             <h4> {doc['file_name']} (Chunk {doc['chunk_index']})</h4>
-                            <p><strong>Content:</strong> {doc['content']}</p>
+                            <p><strong>Content:</strong> {snippet}</p>
                             <small>ID: {doc['id'][:8]}... | Date: {doc['created_date']}</small>
                         </div>
                         """, unsafe_allow_html=True)
+                        with st.expander("Full chunk"):
+                            st.text(doc['content'])
         
         elif st.session_state.current_view == "agent" and hasattr(st.session_state, 'agent_response') and st.session_state.agent_response:
             st.header("🤖 Agent Response")
@@ -308,7 +318,8 @@ def main():
                 if filter_text:
                     st.info(f"Showing {len(filtered_documents)} of {len(documents)} documents matching '{filter_text}'")
                 
-                for doc in filtered_documents[:10]:
+                # Render every loaded page: documents fetched by "Load more documents" follow the earlier ones
+                for doc in filtered_documents:
                     with st.container():
                         st.markdown(f"""
                         <div class="document-card">
@@ -317,9 +328,12 @@ def main():
                             <small>ID: {doc['id'][:8]}... | Date: {doc['created_date']}</small>
                         </div>
                         """, unsafe_allow_html=True)
-                
-                if len(filtered_documents) > 10:
-                    st.info(f"Showing first 10 of {len(filtered_documents)} filtered documents.")
+
+                if st.session_state.documents_cursor and st.button("Load more documents"):
+                    page = fetch_documents(st.session_state.selected_tenant, after=st.session_state.documents_cursor)
+                    st.session_state.all_documents = documents + page
+                    st.session_state.documents_cursor = next_cursor(page)
+                    st.rerun()
             else:
                 st.warning("No documents found for this tenant.")
     
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-tenant write counters; data_to_weaviate.py bumps a tenant after writing to it. The default file
+# is absolute (next to this module) so the ingest script and the API share it whatever their working
+# directory; TENANT_VERSIONS_PATH moves it, and with QUERY_CACHE_REDIS_URL they share Redis instead
+DEFAULT_TENANT_VERSIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tenant_versions.json")
+TENANT_VERSIONS_PATH = os.path.abspath(os.getenv('TENANT_VERSIONS_PATH', DEFAULT_TENANT_VERSIONS_PATH))
+TENANT_VERSIONS_REDIS_KEY = "tenant-versions"
+TENANT_VERSIONS_REFRESH = float(os.getenv('TENANT_VERSIONS_REFRESH', 1.0))  # seconds between Redis reads
+DEFAULT_COUNT_TTL = 300  # seconds; also covers writers that never bump the file
+
+class TenantVersions:
+    """Version number per tenant, shared between ingestion and the serving processes.
+
+    Readers key cached results on a tenant's version, so a bump invalidates
+    them without any messaging. The file is re-read only when its mtime changes.
+    """
+
+    def __init__(self, path: str = TENANT_VERSIONS_PATH):
+        self.path = path
+        self._mtime = None
+        self._versions = {}
+
+    def all(self) -> Dict[str, int]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._mtime:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._versions = json.load(f)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass  # mid-replace or unreadable: keep the last good copy
+        return self._versions
+
+    def get(self, tenant: str) -> int:
+        return self.all().get(tenant, 0)
+
+    def bump(self, tenants: Iterable[str]):
+        """Increment the given tenants and write the file atomically"""
+        versions = dict(self.all())
+        for tenant in tenants:
+            versions[tenant] = versions.get(tenant, 0) + 1
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(versions, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._versions = versions
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+class RedisTenantVersions:
+    """TenantVersions kept in a Redis hash, for ingestion and API processes on different hosts.
+
+    Reads are cached for `refresh` seconds, so a bump is seen within that delay
+    and a request does not wait on Redis for every cache key.
+    """
+
+    def __init__(self, client, key: str = TENANT_VERSIONS_REDIS_KEY, refresh: float = TENANT_VERSIONS_REFRESH,
+                 clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.key = key
+        self.refresh = refresh
+        self.clock = clock
+        self._read_at = None
+        self._versions = {}
+
+    def all(self) -> Dict[str, int]:
+        now = self.clock()
+        if self._read_at is None or now - self._read_at >= self.refresh:
+            try:
+                self._versions = {
+                    (tenant.decode() if isinstance(tenant, bytes) else tenant): int(version)
+                    for tenant, version in self.client.hgetall(self.key).items()
+                }
+            except Exception as e:
+                logger.warning(f"Tenant versions unavailable from Redis, using the last copy: {e}")
+            self._read_at = now
+        return self._versions
+
+    def get(self, tenant: str) -> int:
+        return self.all().get(tenant, 0)
+
+    def bump(self, tenants: Iterable[str]):
+        pipeline = self.client.pipeline()
+        for tenant in tenants:
+            pipeline.hincrby(self.key, tenant, 1)
+        pipeline.execute()
+        self._read_at = None
+
+def create_tenant_versions(path: Optional[str] = None, redis_url: Optional[str] = None):
+    """Versions in Redis when QUERY_CACHE_REDIS_URL is set and redis is installed, in the shared file otherwise.
+
+    The environment is read here rather than at import, after callers have loaded their .env.
+    """
+    redis_url = redis_url or os.getenv('QUERY_CACHE_REDIS_URL')
+    path = os.path.abspath(path or os.getenv('TENANT_VERSIONS_PATH', DEFAULT_TENANT_VERSIONS_PATH))
+    if redis_url:
+        try:
+            import redis
+        except ImportError:
+            logger.warning("QUERY_CACHE_REDIS_URL is set but redis is not installed; tenant versions use a file")
+        else:
+            return RedisTenantVersions(redis.Redis.from_url(redis_url))
+    return TenantVersions(path)
+
+class TenantCountCache:
+    """Document count per tenant, valid until the tenant's version changes or `ttl` passes"""
+
+    def __init__(self, versions: Optional[TenantVersions] = None, ttl: float = DEFAULT_COUNT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.versions = versions or TenantVersions()
+        self.ttl = ttl
+        self.clock = clock
+        # {tenant: (version, stored_at, count)}
+        self._entries: Dict[str, Tuple[int, float, int]] = {}
+
+    def get(self, tenant: str) -> Optional[int]:
+        entry = self._entries.get(tenant)
+        if entry is None:
+            return None
+        version, stored_at, count = entry
+        if version != self.versions.get(tenant) or self.clock() - stored_at > self.ttl:
+            del self._entries[tenant]
+            return None
+        return count
+
+    def set(self, tenant: str, count: int, version: Optional[int] = None):
+        """Store a count; pass the version read before querying so a concurrent bump wins"""
+        if version is None:
+            version = self.versions.get(tenant)
+        self._entries[tenant] = (version, self.clock(), count)
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def fake_weaviate(tmp_path, monkeypatch):
+    """Fake Weaviate client the app connects to, with fresh caches and state files under tmp_path"""
+    import app as app_module
+    from fake_async_weaviate import FakeAsyncClient
+    from query_cache import QueryCache
+    from semantic_cache import SemanticCache
+    from single_flight import SingleFlight
+    from tenant_versions import TenantCountCache, TenantVersions
+    from weaviate_connection import WeaviateConnection
+
+    monkeypatch.chdir(tmp_path)
+    versions = TenantVersions(str(tmp_path / "tenant_versions.json"))
+    monkeypatch.setattr(app_module, "tenant_versions", versions)
+    monkeypatch.setattr(app_module, "tenant_counts", TenantCountCache(versions))
+    monkeypatch.setattr(app_module, "query_cache", QueryCache(versions))
+    monkeypatch.setattr(app_module, "semantic_cache", SemanticCache(None, versions))
+    monkeypatch.setattr(app_module, "single_flight", SingleFlight())
+
+    client = FakeAsyncClient()
+    monkeypatch.setattr(app_module, "WeaviateConnection", lambda: WeaviateConnection(client_factory=lambda: client))
+    return client
+
+@pytest.fixture
+def api(fake_weaviate):
+    """(TestClient, fake Weaviate client)"""
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+
+    with TestClient(app_module.app) as test_client:
+        yield test_client, fake_weaviate
@@ -0,0 +1,106 @@
+"""Async stand-in for the Weaviate client calls the API makes.
+
+Each tenant holds `objects_per_tenant` chunks with UUIDs 1..n, so cursor
+order is index order. Searches return the first `limit` chunks; per tenant,
+`latency` delays every call and `error` makes it raise. Calls are recorded
+in `calls` as (method, argument) pairs.
+"""
+import asyncio
+import uuid
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+def make_object(index: int, tenant: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        uuid=uuid.UUID(int=index + 1),
+        properties={
+            "content": f"{tenant} policy chunk {index}: employees accrue paid leave " * 10,
+            "file_id": f"file-{index // 3}",
+            "file_name": f"doc_{index // 3}.md",
+            "chunk_index": index % 3,
+            "created_date": "2024-01-01",
+            "canonical_id": None,
+        },
+        metadata=SimpleNamespace(score=1.0 / (index + 1), distance=None),
+    )
+
+class FakeTenantCollection:
+    def __init__(self, tenant: str, objects: int):
+        self.tenant = tenant
+        self.objects = [make_object(index, tenant) for index in range(objects)]
+        self.latency = 0.0
+        self.error: Optional[Exception] = None
+        self.generated: Optional[str] = "generated answer"
+        self.calls: List = []
+        self.query = SimpleNamespace(
+            bm25=self._search, near_text=self._search, hybrid=self._search,
+            fetch_objects=self._fetch_objects, fetch_object_by_id=self._fetch_object_by_id,
+        )
+        self.generate = SimpleNamespace(near_text=self._generate, fetch_objects=self._generate)
+        self.aggregate = SimpleNamespace(over_all=self._over_all)
+
+    async def _call(self, method: str, argument=None):
+        self.calls.append((method, argument))
+        await asyncio.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+
+    async def _search(self, query: str, limit: int = 10, **kwargs):
+        await self._call("search", query)
+        return SimpleNamespace(objects=self.objects[:limit])
+
+    async def _fetch_objects(self, limit: int = 10, after: Optional[str] = None, filters=None, **kwargs):
+        await self._call("fetch_objects", filters.value if filters is not None else after)
+        objects = self.objects
+        if filters is not None:
+            wanted = {str(object_id).lower() for object_id in filters.value}
+            objects = [obj for obj in objects if str(obj.uuid) in wanted]
+        if after is not None:
+            objects = [obj for obj in objects if obj.uuid > uuid.UUID(after)]
+        return SimpleNamespace(objects=objects[:limit])
+
+    async def _fetch_object_by_id(self, object_id: str, **kwargs):
+        await self._call("fetch_object_by_id", object_id)
+        return next((obj for obj in self.objects if str(obj.uuid) == object_id), None)
+
+    async def _generate(self, **kwargs):
+        await self._call("generate", kwargs.get("query"))
+        return SimpleNamespace(generated=self.generated, objects=[])
+
+    async def _over_all(self, total_count: bool = True):
+        await self._call("aggregate")
+        return SimpleNamespace(total_count=len(self.objects))
+
+class FakeCollection:
+    def __init__(self, objects_per_tenant: int):
+        self.objects_per_tenant = objects_per_tenant
+        self.tenants: Dict[str, FakeTenantCollection] = {}
+
+    def with_tenant(self, tenant: str) -> FakeTenantCollection:
+        if tenant not in self.tenants:
+            self.tenants[tenant] = FakeTenantCollection(tenant, self.objects_per_tenant)
+        return self.tenants[tenant]
+
+class FakeAsyncClient:
+    def __init__(self, objects_per_tenant: int = 30):
+        self.documents = FakeCollection(objects_per_tenant)
+        self.collections = SimpleNamespace(get=self._get_collection)
+        self.connected = False
+
+    def _get_collection(self, name: str) -> FakeCollection:
+        return self.documents
+
+    def tenant(self, tenant: str) -> FakeTenantCollection:
+        return self.documents.with_tenant(tenant)
+
+    async def connect(self):
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def is_ready(self) -> bool:
+        return True
+
+    async def close(self):
+        self.connected = False
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import app
+from fake_async_weaviate import FakeCollection
+
+class MultiCollectionClient:
+    """Client whose collections are separate FakeCollections, created on first use"""
+    def __init__(self):
+        self.by_name = {}
+        self.collections = SimpleNamespace(get=self._get)
+
+    def _get(self, name: str) -> FakeCollection:
+        return self.by_name.setdefault(name, FakeCollection(20))
+
+    def tenant(self, collection: str, tenant: str = "HR"):
+        return self._get(collection).with_tenant(tenant)
+
+def source(collection: str, index: int):
+    return SimpleNamespace(collection=collection, object_id=f"00000000-0000-0000-0000-{index + 1:012X}")
+
+def fetch_calls(client, collection):
+    return [method for method, _ in client.tenant(collection).calls if method == "fetch_objects"]
+
+def test_one_fetch_per_collection_in_agent_order():
+    client = MultiCollectionClient()
+    sources = [source("Documents", 4), source("Policies", 2), source("Documents", 1), source("Policies", 7)]
+
+    hydrated = asyncio.run(app.hydrate_sources(client, "HR", sources))
+
+    assert [(item["collection"], item["id"]) for item in hydrated] == [(s.collection, s.object_id) for s in sources]
+    assert hydrated[0]["file_name"] == "doc_1.md" and hydrated[0]["chunk_index"] == 1
+    assert len(fetch_calls(client, "Documents")) == 1 and len(fetch_calls(client, "Policies")) == 1
+
+def test_missing_objects_are_skipped():
+    client = MultiCollectionClient()
+    sources = [source("Documents", 3), source("Documents", 99), source("Documents", 0)]
+
+    hydrated = asyncio.run(app.hydrate_sources(client, "HR", sources))
+
+    assert [item["id"] for item in hydrated] == [sources[0].object_id, sources[2].object_id]
+
+def test_failing_collection_does_not_drop_the_others():
+    client = MultiCollectionClient()
+    client.tenant("Policies").error = RuntimeError("collection not found")
+    sources = [source("Policies", 1), source("Documents", 2), source("Policies", 3), source("Documents", 5)]
+
+    hydrated = asyncio.run(app.hydrate_sources(client, "HR", sources))
+
+    assert [item["id"] for item in hydrated] == [sources[1].object_id, sources[3].object_id]
+
+def test_collections_are_fetched_concurrently():
+    client = MultiCollectionClient()
+    for collection in ("Documents", "Policies", "Handbooks"):
+        client.tenant(collection).latency = 0.2
+    sources = [source(collection, 1) for collection in ("Documents", "Policies", "Handbooks")]
+
+    started = time.perf_counter()
+    hydrated = asyncio.run(app.hydrate_sources(client, "HR", sources))
+    elapsed = time.perf_counter() - started
+
+    assert len(hydrated) == 3
+    assert elapsed < 0.5  # three 0.2s fetches side by side
@@ -0,0 +1,101 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("box_sdk_gen")
+
+import box_source
+from box_source import BoxFolderSync, init_box_client
+from fake_box_api import FakeBox, make_handler
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+@pytest.fixture
+def box(tmp_path, monkeypatch):
+    root = tmp_path / "box"
+    write(str(root / "HR" / "leave.md"), "leave policy")
+    write(str(root / "HR" / "pay.md"), "pay policy")
+    write(str(root / "Finance" / "budget.md"), "budget")
+    write(str(root / "Finance" / "notes.txt"), "not markdown")
+    fake = FakeBox(str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fake))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(box_source, "BOX_DEVELOPER_TOKEN", "dev")
+    try:
+        yield fake, f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def make_sync(tmp_path, fake, base_url):
+    folders = {info["name"]: folder_id for folder_id, info in fake.folders.items()}
+    sync = BoxFolderSync(init_box_client(base_url), folders, mirror_dir=str(tmp_path / "mirror"),
+                         state_path=str(tmp_path / "state.json"), workers=2)
+    downloaded = []
+    download = sync.download
+
+    def counting_download(tenant, file_id, name):
+        downloaded.append(f"{tenant}/{name}")
+        download(tenant, file_id, name)
+
+    sync.download = counting_download
+    return sync, downloaded
+
+def mirror_files(tmp_path):
+    mirror = tmp_path / "mirror"
+    return sorted(f"{tenant}/{name}" for tenant in os.listdir(mirror) for name in os.listdir(mirror / tenant))
+
+def test_first_sync_mirrors_markdown_files(tmp_path, box):
+    fake, base_url = box
+    sync, downloaded = make_sync(tmp_path, fake, base_url)
+
+    file_ids = sync.sync()
+
+    assert mirror_files(tmp_path) == ["Finance/budget.md", "HR/leave.md", "HR/pay.md"]
+    assert sorted(downloaded) == ["Finance/budget.md", "HR/leave.md", "HR/pay.md"]
+    assert read(str(tmp_path / "mirror" / "HR" / "pay.md")) == "pay policy"
+    assert set(file_ids) == {("Finance", "budget.md"), ("HR", "leave.md"), ("HR", "pay.md")}
+
+def test_later_syncs_follow_edits_deletions_and_renames(tmp_path, box):
+    fake, base_url = box
+    sync, downloaded = make_sync(tmp_path, fake, base_url)
+    first_ids = sync.sync()
+    downloaded.clear()
+
+    # A new process picks up from the saved stream position
+    sync, downloaded = make_sync(tmp_path, fake, base_url)
+    write(os.path.join(fake.root, "HR", "pay.md"), "pay policy, revised")
+    file_ids = sync.sync()
+    assert downloaded == ["HR/pay.md"]
+    assert read(str(tmp_path / "mirror" / "HR" / "pay.md")) == "pay policy, revised"
+    assert file_ids == first_ids
+
+    downloaded.clear()
+    os.remove(os.path.join(fake.root, "HR", "leave.md"))
+    file_ids = sync.sync()
+    assert downloaded == []
+    assert mirror_files(tmp_path) == ["Finance/budget.md", "HR/pay.md"]
+    assert ("HR", "leave.md") not in file_ids
+
+    fake.rename("Finance", "budget.md", "budget-2025.md")
+    file_ids = sync.sync()
+    assert mirror_files(tmp_path) == ["Finance/budget-2025.md", "HR/pay.md"]
+    assert file_ids[("Finance", "budget-2025.md")] == first_ids[("Finance", "budget.md")]
+
+def test_sync_without_events_downloads_nothing(tmp_path, box):
+    fake, base_url = box
+    sync, downloaded = make_sync(tmp_path, fake, base_url)
+    sync.sync()
+    downloaded.clear()
+    sync.sync()
+    assert downloaded == []
@@ -0,0 +1,61 @@
+import html
+
+from data_models import collapse_duplicates, make_snippet, missing_canonicals
+
+def hit(object_id, score, canonical_id=None, content=None):
+    return {"id": object_id, "content": content or f"chunk {object_id}", "canonical_id": canonical_id, "score": score}
+
+def test_groups_are_returned_as_their_canonical_chunk_at_the_best_rank():
+    hits = [hit("dup", 0.9, canonical_id="canon"), hit("other", 0.8), hit("canon", 0.7)]
+
+    collapsed = collapse_duplicates(hits)
+
+    assert [(document["id"], document["score"]) for document in collapsed] == [("canon", 0.9), ("other", 0.8)]
+    assert collapsed[0]["content"] == "chunk canon"
+
+def test_canonicals_missing_from_the_hits_are_filled_in():
+    hits = [hit("dup-1", 0.9, canonical_id="canon"), hit("dup-2", 0.8, canonical_id="canon"), hit("other", 0.7)]
+    assert missing_canonicals(hits) == ["canon"]
+
+    collapsed = collapse_duplicates(hits, canonicals={"canon": hit("canon", None, content="original")})
+
+    assert [document["id"] for document in collapsed] == ["canon", "other"]
+    assert collapsed[0]["content"] == "original" and collapsed[0]["score"] == 0.9
+
+def test_deleted_canonical_keeps_the_best_duplicate():
+    hits = [hit("dup-1", 0.9, canonical_id="gone"), hit("dup-2", 0.8, canonical_id="gone")]
+    assert [document["id"] for document in collapse_duplicates(hits, canonicals={})] == ["dup-1"]
+
+def test_limit_applies_to_groups():
+    hits = [hit(f"dup-{i}", 1 - i / 10, canonical_id="canon") for i in range(3)] + [hit(f"h{i}", 0.5) for i in range(5)]
+
+    collapsed = collapse_duplicates(hits, limit=3, canonicals={"canon": hit("canon", None)})
+
+    assert [document["id"] for document in collapsed] == ["canon", "h0", "h1"]
+    assert missing_canonicals(hits, limit=1) == ["canon"]
+    assert missing_canonicals(hits[3:], limit=3) == []
+
+def test_snippet_never_highlights_inside_entities():
+    content = 'Fish & chips < 5 > 2 "quoted" it\'s'
+    expected = html.escape(content).replace("Fish", "<mark>Fish</mark>")
+    for entity in ("amp", "lt", "gt", "quot", "x27"):
+        assert make_snippet(content, f"fish {entity}") == expected
+
+def test_snippet_escapes_around_and_inside_matches():
+    assert make_snippet("<b>leave</b> & pay", "leave") == "&lt;b&gt;<mark>leave</mark>&lt;/b&gt; &amp; pay"
+    assert make_snippet("Q&A: Q&A", "q") == "Q&amp;A: Q&amp;A"  # one-letter terms are ignored
+
+def test_snippet_matches_case_insensitively():
+    assert make_snippet("Annual Leave: LEAVE accrues", "leave") == \
+        "Annual <mark>Leave</mark>: <mark>LEAVE</mark> accrues"
+
+def test_snippet_window_is_clipped_around_the_densest_match():
+    content = " ".join(["filler"] * 200 + ["parental", "leave", "policy"] + ["filler"] * 200)
+    snippet = make_snippet(content, "parental leave", length=60)
+
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>parental</mark> <mark>leave</mark>" in snippet
+    assert len(snippet.replace("<mark>", "").replace("</mark>", "")) <= 62
+
+def test_snippet_without_matches_is_the_escaped_start():
+    assert make_snippet("a < b " * 100, "zebra", length=20) == "a &lt; b a &lt; b a &lt; b a…"
@@ -0,0 +1,72 @@
+import json
+
+import app
+
+def test_documents_page_through_with_the_cursor(api):
+    test_client, _ = api
+    ids, after = [], None
+    for _ in range(4):
+        params = {"limit": 12} if after is None else {"limit": 12, "after": after}
+        response = test_client.get("/documents/HR", params=params)
+        assert response.status_code == 200
+        ids += [document["id"] for document in response.json()]
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+
+    assert len(ids) == 30 and len(set(ids)) == 30
+    assert ids == sorted(ids)
+    assert after is None  # the last page (6 documents) is short
+
+def test_documents_full_last_page_has_a_cursor_then_an_empty_page(api):
+    test_client, _ = api
+    response = test_client.get("/documents/HR", params={"limit": 30})
+    assert len(response.json()) == 30
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = test_client.get("/documents/HR", params={"limit": 30, "after": cursor})
+    assert response.json() == [] and "X-Next-Cursor" not in response.headers
+
+def test_documents_page_size_is_limited(api):
+    test_client, _ = api
+    assert test_client.get("/documents/HR", params={"limit": app.MAX_PAGE_SIZE + 1}).status_code == 422
+    assert test_client.get("/documents/HR", params={"limit": 0}).status_code == 422
+
+def test_export_streams_every_document_across_pages(api, monkeypatch):
+    test_client, client = api
+    monkeypatch.setattr(app, "EXPORT_PAGE_SIZE", 7)
+
+    response = test_client.get("/documents/HR/export")
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    documents = [json.loads(line) for line in response.text.splitlines()]
+    assert len(documents) == 30 and len({document["id"] for document in documents}) == 30
+    assert len([method for method, _ in client.tenant("HR").calls if method == "fetch_objects"]) == 5
+
+def test_export_resumes_after_a_cursor(api, monkeypatch):
+    test_client, _ = api
+    monkeypatch.setattr(app, "EXPORT_PAGE_SIZE", 7)
+    first = test_client.get("/documents/HR", params={"limit": 10}).json()
+
+    response = test_client.get("/documents/HR/export", params={"after": first[-1]["id"]})
+
+    documents = [json.loads(line) for line in response.text.splitlines()]
+    assert [document["id"] for document in documents][0] > first[-1]["id"]
+    assert len(documents) == 20
+
+def test_export_failure_ends_with_a_resumable_error_line(api, monkeypatch):
+    test_client, client = api
+    monkeypatch.setattr(app, "EXPORT_PAGE_SIZE", 7)
+    hr = client.tenant("HR")
+    fetch_objects = hr.query.fetch_objects
+
+    async def failing_after_two_pages(**kwargs):
+        if len(hr.calls) == 2:
+            raise RuntimeError("connection reset")
+        return await fetch_objects(**kwargs)
+
+    hr.query.fetch_objects = failing_after_two_pages
+    lines = [json.loads(line) for line in test_client.get("/documents/HR/export").text.splitlines()]
+
+    assert len(lines) == 15
+    assert lines[-1] == {"error": "connection reset", "after": lines[13]["id"]}
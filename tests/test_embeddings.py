@@ -0,0 +1,52 @@
+import pytest
+from weaviate.collections.classes.config_methods import _collection_config_from_json
+
+from embeddings import INGEST_EMBEDDERS, HashingEmbedder, OpenAIEmbedder, check_vectorizer
+
+HNSW = {"skip": False, "cleanupIntervalSeconds": 300, "maxConnections": 64, "efConstruction": 128, "ef": -1,
+        "dynamicEfMin": 100, "dynamicEfMax": 500, "dynamicEfFactor": 8, "vectorCacheMaxObjects": 1000000000000,
+        "flatSearchCutoff": 40000, "distance": "cosine"}
+
+def collection_config(vectorizer=None, module_config=None, named=None):
+    schema = {
+        "class": "Documents",
+        "properties": [],
+        "multiTenancyConfig": {"enabled": True},
+        "invertedIndexConfig": {"bm25": {"b": 0.75, "k1": 1.2}, "cleanupIntervalSeconds": 60,
+                                "stopwords": {"preset": "en", "additions": None, "removals": None}},
+        "replicationConfig": {"factor": 1},
+        "shardingConfig": {"virtualPerPhysical": 128, "desiredCount": 1, "actualCount": 1,
+                           "desiredVirtualCount": 128, "actualVirtualCount": 128, "key": "_id",
+                           "strategy": "hash", "function": "murmur3"},
+    }
+    if named:
+        schema["vectorConfig"] = {
+            "default": {"vectorizer": named, "vectorIndexType": "hnsw", "vectorIndexConfig": HNSW}
+        }
+    else:
+        schema.update(vectorizer=vectorizer, moduleConfig={vectorizer: module_config or {}},
+                      vectorIndexType="hnsw", vectorIndexConfig=HNSW)
+    return _collection_config_from_json(schema)
+
+def test_only_embedders_with_a_weaviate_vectorizer_can_ingest():
+    assert INGEST_EMBEDDERS == ["openai"]
+
+def test_openai_embedder_needs_an_openai_collection():
+    embedder = OpenAIEmbedder(api_key="test")
+    with pytest.raises(ValueError, match="text2vec-weaviate"):
+        check_vectorizer(embedder, collection_config("text2vec-weaviate"))
+    check_vectorizer(embedder, collection_config("text2vec-openai"))
+    check_vectorizer(embedder, collection_config(
+        named={"text2vec-openai": {"model": "text-embedding-3-small"}}))
+
+def test_openai_model_and_dimensions_must_match():
+    embedder = OpenAIEmbedder(api_key="test")
+    with pytest.raises(ValueError):
+        check_vectorizer(embedder, collection_config("text2vec-openai", {"model": "text-embedding-3-large"}))
+    with pytest.raises(ValueError):
+        check_vectorizer(embedder, collection_config(
+            named={"text2vec-openai": {"model": "text-embedding-3-small", "dimensions": 512}}))
+
+def test_hashing_embedder_matches_no_collection():
+    with pytest.raises(ValueError):
+        check_vectorizer(HashingEmbedder(), collection_config("text2vec-openai"))
@@ -0,0 +1,64 @@
+import pytest
+
+import app
+from data_models import RRF_K, fuse_results
+
+def hits(prefix, scores):
+    return [{"id": f"{prefix}{rank}", "score": score} for rank, score in enumerate(scores)]
+
+def test_rrf_interleaves_tenants_by_rank_whatever_their_score_scale():
+    fused = fuse_results({"HR": hits("hr", [40.0, 30.0, 20.0]), "Finance": hits("fin", [0.9, 0.8])}, "rrf", 4)
+
+    assert [document["id"] for document in fused] == ["hr0", "fin0", "hr1", "fin1"]
+    assert fused[0]["score"] == pytest.approx(1 / (RRF_K + 1))
+    assert [document["tenant"] for document in fused if document["id"].startswith("hr")] == ["HR", "HR"]
+
+def test_score_fusion_normalizes_each_tenant():
+    fused = fuse_results({"HR": hits("hr", [40.0, 35.0, 20.0]), "Finance": hits("fin", [0.9, 0.1])}, "score", 5)
+
+    assert [(document["id"], document["score"]) for document in fused] == [
+        ("hr0", 1.0), ("fin0", 1.0), ("hr1", 0.75), ("hr2", 0.0), ("fin1", 0.0),
+    ]
+
+def test_federated_search_tags_and_fuses_every_tenant(api):
+    test_client, _ = api
+    response = test_client.post("/search/federated", json={"query": "leave", "search_type": "keyword", "limit": 6})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["tenants"] == app.DEFAULT_TENANTS and body["timed_out"] == [] and body["failed"] == {}
+    assert len(body["documents"]) == 6
+    # Equal ranks across tenants: every tenant's first hit comes before any second hit
+    assert sorted(document["tenant"] for document in body["documents"][:3]) == sorted(app.DEFAULT_TENANTS)
+    assert all(document["content"].startswith(document["tenant"]) for document in body["documents"])
+
+def test_slow_tenant_times_out_without_holding_up_the_others(api):
+    test_client, client = api
+    client.tenant("Finance").latency = 1.0
+
+    response = test_client.post("/search/federated", json={
+        "query": "leave", "search_type": "keyword", "tenants": ["HR", "Finance"], "tenant_timeout": 0.2,
+    })
+
+    body = response.json()
+    assert body["timed_out"] == ["Finance"] and body["failed"] == {}
+    assert body["documents"] and {document["tenant"] for document in body["documents"]} == {"HR"}
+
+def test_failing_tenant_is_reported_without_failing_the_request(api):
+    test_client, client = api
+    client.tenant("Broken").error = RuntimeError("tenant not found")
+
+    response = test_client.post("/search/federated", json={
+        "query": "leave", "search_type": "keyword", "tenants": ["HR", "Broken"],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["failed"]) == ["Broken"] and "tenant not found" in body["failed"]["Broken"]
+    assert {document["tenant"] for document in body["documents"]} == {"HR"}
+
+def test_tenant_timeout_is_bounded(api):
+    test_client, _ = api
+    for timeout in (0, app.FEDERATED_TENANT_TIMEOUT + 1):
+        response = test_client.post("/search/federated", json={"query": "leave", "tenant_timeout": timeout})
+        assert response.status_code == 422
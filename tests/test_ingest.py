@@ -0,0 +1,203 @@
+import os
+
+import pytest
+
+from data_to_weaviate import run_ingest
+from dedup import NearDuplicateStore
+from fake_weaviate import FakeCollection
+from ingest_manifest import IngestCheckpoint, IngestManifest
+from tenant_versions import TenantVersions
+
+def write_file(root, tenant, name, words):
+    folder = os.path.join(root, tenant)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+        f.write(" ".join(words))
+
+def distinct_words(prefix, count):
+    return [f"{prefix}{i}" for i in range(count)]
+
+@pytest.fixture
+def workspace(tmp_path):
+    data_dir = str(tmp_path / "data")
+    os.makedirs(data_dir)
+    return data_dir, str(tmp_path / "manifest.json")
+
+def ingest(collection, data_dir, manifest_path, **options):
+    manifest = IngestManifest.load(manifest_path)
+    return run_ingest(collection, data_dir, manifest, workers=1, **options), manifest
+
+def test_emptied_tenant_folder_deletes_its_chunks(workspace):
+    data_dir, manifest_path = workspace
+    write_file(data_dir, "HR", "a.md", distinct_words("hr", 450))
+    write_file(data_dir, "Finance", "b.md", distinct_words("fin", 450))
+    collection = FakeCollection()
+    ingest(collection, data_dir, manifest_path)
+    assert len(collection.with_tenant("Finance").objects) == 3
+
+    os.remove(os.path.join(data_dir, "Finance", "b.md"))
+    _, manifest = ingest(collection, data_dir, manifest_path)
+
+    assert collection.with_tenant("Finance").objects == {}
+    assert manifest.files("Finance") == []
+    assert len(collection.with_tenant("HR").objects) == 3
+
+def test_unchanged_rerun_sends_nothing(workspace):
+    data_dir, manifest_path = workspace
+    write_file(data_dir, "HR", "a.md", distinct_words("hr", 450))
+    collection = FakeCollection()
+    ingest(collection, data_dir, manifest_path)
+    result, _ = ingest(collection, data_dir, manifest_path)
+    assert result["sent"] == 0
+    assert len(collection.with_tenant("HR").objects) == 3
+
+def dedup_ingest(collection, data_dir, manifest_path, mode):
+    store = NearDuplicateStore(os.path.join(os.path.dirname(manifest_path), "dedup.json"))
+    result, manifest = ingest(collection, data_dir, manifest_path, dedup_store=store, dedup_mode=mode)
+    return result["dedup"], manifest
+
+@pytest.mark.parametrize("mode", ["drop", "link"])
+def test_edited_chunk_is_not_a_duplicate_of_its_old_version(workspace, mode):
+    data_dir, manifest_path = workspace
+    words = distinct_words("w", 450)
+    write_file(data_dir, "HR", "a.md", words)
+    collection = FakeCollection()
+    dedup_ingest(collection, data_dir, manifest_path, mode)
+    before = set(collection.with_tenant("HR").objects)
+
+    words[3] = "edited"
+    write_file(data_dir, "HR", "a.md", words)
+    report, manifest = dedup_ingest(collection, data_dir, manifest_path, mode)
+
+    objects = collection.with_tenant("HR").objects
+    assert len(objects) == 3
+    assert report["HR"].get("duplicates", 0) == 0
+    new_ids = set(objects) - before
+    assert len(new_ids) == 1
+    assert "canonical_id" not in objects[new_ids.pop()].properties
+    assert set(manifest.get_file("HR", "a.md")["chunks"]) == set(objects)
+
+def stored_file_names(collection, tenant="HR"):
+    return sorted(obj.properties["file_name"] for obj in collection.with_tenant(tenant).objects.values())
+
+def test_dropped_duplicate_is_uploaded_once_its_canonical_is_gone(workspace):
+    data_dir, manifest_path = workspace
+    words = distinct_words("w", 200)
+    write_file(data_dir, "HR", "a.md", words)
+    write_file(data_dir, "HR", "b.md", words[:-1] + ["changed"])
+    collection = FakeCollection()
+    report, manifest = dedup_ingest(collection, data_dir, manifest_path, "drop")
+
+    assert report["HR"]["duplicates"] == 1
+    canonical_file, = stored_file_names(collection)
+    duplicate_file = "b.md" if canonical_file == "a.md" else "a.md"
+    # Only stored chunks are recorded; the dropped one is kept with its canonical
+    stored = set(collection.with_tenant("HR").objects)
+    assert set(manifest.get_file("HR", canonical_file)["chunks"]) == stored
+    assert manifest.get_file("HR", duplicate_file)["chunks"] == []
+    assert list(manifest.get_file("HR", duplicate_file)["dropped"].values()) == list(stored)
+
+    os.remove(os.path.join(data_dir, "HR", canonical_file))
+    _, manifest = dedup_ingest(collection, data_dir, manifest_path, "drop")
+    assert manifest.get_file("HR", duplicate_file)["sha256"] is None  # re-checked by the next run
+    _, manifest = dedup_ingest(collection, data_dir, manifest_path, "drop")
+
+    assert stored_file_names(collection) == [duplicate_file]
+    assert manifest.get_file("HR", duplicate_file)["sha256"] is not None
+    assert "dropped" not in manifest.get_file("HR", duplicate_file)
+
+def test_unchanged_files_with_dropped_duplicates_are_not_rechecked(workspace):
+    data_dir, manifest_path = workspace
+    words = distinct_words("w", 200)
+    for index in range(5):
+        write_file(data_dir, "HR", f"{index}.md", words[:-1] + [f"copy{index}"])
+    collection = FakeCollection()
+    report, _ = dedup_ingest(collection, data_dir, manifest_path, "drop")
+    assert report["HR"] == {"checked": 5, "duplicates": 4}
+
+    for _ in range(2):
+        report, manifest = dedup_ingest(collection, data_dir, manifest_path, "drop")
+        assert report["HR"] == {}
+        assert all(manifest.get_file("HR", f"{index}.md")["sha256"] for index in range(5))
+    assert len(collection.with_tenant("HR").objects) == 1
+
+def test_editing_the_canonical_rechecks_its_duplicates(workspace):
+    data_dir, manifest_path = workspace
+    words = distinct_words("w", 200)
+    write_file(data_dir, "HR", "a.md", words)
+    write_file(data_dir, "HR", "b.md", words[:-1] + ["changed"])
+    collection = FakeCollection()
+    dedup_ingest(collection, data_dir, manifest_path, "drop")
+    canonical_file, = stored_file_names(collection)
+
+    write_file(data_dir, "HR", canonical_file, distinct_words("rewritten", 200))
+    dedup_ingest(collection, data_dir, manifest_path, "drop")
+    report, _ = dedup_ingest(collection, data_dir, manifest_path, "drop")
+
+    assert report["HR"] == {"checked": 1}
+    assert stored_file_names(collection) == ["a.md", "b.md"]
+
+class Crash(Exception):
+    pass
+
+def crash_after(tenant_collection, requests):
+    """Make the tenant's batch requests raise once `requests` have succeeded; returns the sent UUIDs"""
+    sent = []
+
+    def crashing_send(objects):
+        if requests is not None and len(sent) >= requests:
+            raise Crash("connection lost")
+        type(tenant_collection).send(tenant_collection, objects)
+        sent.append([obj.uuid for obj in objects])
+
+    tenant_collection.send = crashing_send
+    return sent
+
+def checkpoint_ingest(collection, data_dir, manifest_path, resume, versions=None):
+    checkpoint = IngestCheckpoint(os.path.join(os.path.dirname(manifest_path), "checkpoint.jsonl"), resume=resume)
+    try:
+        return ingest(collection, data_dir, manifest_path, checkpoint=checkpoint, tenant_versions=versions,
+                      checkpoint_every=2, batch_mode="fixed", batch_size=2, max_retries=0)
+    finally:
+        checkpoint.close()
+
+def test_resume_skips_confirmed_chunks_and_sends_the_rest(workspace):
+    data_dir, manifest_path = workspace
+    for name in ("a.md", "b.md", "c.md"):
+        write_file(data_dir, "HR", name, distinct_words(name[0], 450))
+    collection = FakeCollection()
+    hr = collection.with_tenant("HR")
+
+    first_run = crash_after(hr, 2)
+    with pytest.raises(Crash):
+        checkpoint_ingest(collection, data_dir, manifest_path, resume=False)
+    confirmed = {object_id for batch in first_run for object_id in batch}
+    assert len(confirmed) == 4 and set(hr.objects) == confirmed
+
+    second_run = crash_after(hr, None)
+    result, manifest = checkpoint_ingest(collection, data_dir, manifest_path, resume=True)
+    resent = [object_id for batch in second_run for object_id in batch]
+
+    assert result["sent"] == len(resent) == 5
+    assert confirmed.isdisjoint(resent)
+    assert len(hr.objects) == 9 and set(hr.objects) == confirmed | set(resent)
+    assert sum(len(manifest.get_file("HR", name)["chunks"]) for name in manifest.files("HR")) == 9
+
+def test_resume_bumps_the_tenant_even_when_nothing_is_left_to_send(workspace, tmp_path, monkeypatch):
+    data_dir, manifest_path = workspace
+    write_file(data_dir, "HR", "a.md", distinct_words("hr", 450))
+    collection = FakeCollection()
+    versions = TenantVersions(str(tmp_path / "tenant_versions.json"))
+
+    # Every chunk is confirmed, then the run dies before the manifest is saved
+    save = IngestManifest.save
+    monkeypatch.setattr(IngestManifest, "save", lambda self: (_ for _ in ()).throw(Crash("killed")))
+    with pytest.raises(Crash):
+        checkpoint_ingest(collection, data_dir, manifest_path, resume=False, versions=versions)
+    monkeypatch.setattr(IngestManifest, "save", save)
+    assert versions.get("HR") == 0
+
+    result, _ = checkpoint_ingest(collection, data_dir, manifest_path, resume=True, versions=versions)
+
+    assert result["sent"] == 0
+    assert versions.get("HR") == 1
@@ -0,0 +1,61 @@
+from prometheus_client import REGISTRY
+
+import app  # noqa: F401  (registers the cache stats collectors)
+import metrics
+
+def search_count(search_type: str, tenant: str):
+    return REGISTRY.get_sample_value("search_api_search_seconds_count", {"search_type": search_type, "tenant": tenant})
+
+def fallback_count(kind: str):
+    return REGISTRY.get_sample_value("search_api_fallbacks_total", {"kind": kind}) or 0.0
+
+def test_invalid_search_type_is_rejected_before_labelling(api):
+    test_client, _ = api
+    response = test_client.post("/search", json={"query": "leave", "tenant": "HR", "search_type": "bogus-123"})
+
+    assert response.status_code == 400
+    assert search_count("bogus-123", "HR") is None
+
+def test_unknown_tenants_share_one_label(api):
+    test_client, _ = api
+    before = search_count("keyword", "other") or 0.0
+    for tenant in ("tenant-a", "tenant-b"):
+        assert test_client.post("/search", json={"query": "leave", "tenant": tenant, "search_type": "keyword"}).status_code == 200
+
+    assert search_count("keyword", "other") == before + 2
+    assert search_count("keyword", "tenant-a") is None
+
+    test_client.post("/search", json={"query": "leave", "tenant": "HR", "search_type": "keyword"})
+    assert search_count("keyword", "HR") is not None
+
+def test_multiprocess_scrape_keeps_the_cache_stats(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    body, _ = metrics.render_metrics()
+    text = body.decode()
+    for name in ("query_cache", "semantic_cache", "single_flight"):
+        assert f"search_api_{name}_" in text
+
+def test_generative_without_an_answer_keeps_its_type_and_is_counted(api):
+    test_client, client = api
+    hr = client.tenant("HR")
+    hr.generated = None
+    before = fallback_count("generative_no_response")
+    request = {"query": "leave", "tenant": "HR", "search_type": "generative"}
+
+    for _ in range(2):
+        body = test_client.post("/search", json=request).json()
+        assert body["search_type"] == "generative"
+        assert [document["id"] for document in body["documents"]] == ["no_response"]
+
+    assert fallback_count("generative_no_response") == before + 2
+    assert [method for method, _ in hr.calls] == ["generate", "generate"]  # placeholders are not cached
+
+def test_generative_failure_is_an_error_not_a_hybrid_search(api):
+    test_client, client = api
+    hr = client.tenant("HR")
+    hr.error = RuntimeError("LLM unavailable")
+
+    response = test_client.post("/search", json={"query": "leave", "tenant": "HR", "search_type": "generative"})
+
+    assert response.status_code == 500 and "LLM unavailable" in response.json()["detail"]
+    assert [method for method, _ in hr.calls] == ["generate"]
@@ -0,0 +1,47 @@
+import os
+
+import app
+import profiler
+
+def profiled_search(test_client):
+    return test_client.post("/search", json={"query": "leave", "tenant": "HR", "search_type": "keyword"},
+                            headers={"X-Profile": "1"})
+
+def test_profile_header_is_ignored_by_default(api, tmp_path, monkeypatch):
+    test_client, client = api
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path / "profiles"))
+    client.tenant("HR").latency = 0.05
+
+    response = profiled_search(test_client)
+
+    assert app.PROFILE_ALLOW_HEADER is False
+    assert response.status_code == 200 and "X-Profile-File" not in response.headers
+    assert not (tmp_path / "profiles").exists()
+
+def test_allowed_profile_header_writes_a_profile(api, tmp_path, monkeypatch):
+    test_client, client = api
+    monkeypatch.setattr(app, "PROFILE_ALLOW_HEADER", True)
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path / "profiles"))
+    client.tenant("HR").latency = 0.05
+
+    response = profiled_search(test_client)
+
+    assert os.listdir(tmp_path / "profiles") == [response.headers["X-Profile-File"]]
+
+def test_only_the_newest_profiles_are_kept(api, tmp_path, monkeypatch):
+    test_client, client = api
+    profile_dir = tmp_path / "profiles"
+    profile_dir.mkdir()
+    for age in range(5):
+        old = profile_dir / f"old-{age}.folded"
+        old.write_text("main 1\n")
+        os.utime(old, (1000 - age, 1000 - age))
+    (profile_dir / "notes.txt").write_text("not a profile")
+    monkeypatch.setattr(app, "PROFILE_ALLOW_HEADER", True)
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(profile_dir))
+    monkeypatch.setattr(profiler, "PROFILE_MAX_FILES", 3)
+    client.tenant("HR").latency = 0.05
+
+    newest = profiled_search(test_client).headers["X-Profile-File"]
+
+    assert sorted(os.listdir(profile_dir)) == sorted([newest, "old-0.folded", "old-1.folded", "notes.txt"])
@@ -0,0 +1,121 @@
+import asyncio
+import sys
+
+import query_cache
+from query_cache import QueryCache
+from tenant_versions import TenantVersions
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeBackend:
+    """Shared level backed by a dict; `error` makes every call fail"""
+    def __init__(self):
+        self.store = {}
+        self.error = None
+
+    async def get(self, key):
+        if self.error:
+            raise self.error
+        return self.store.get(key)
+
+    async def set(self, key, value, ttl):
+        if self.error:
+            raise self.error
+        self.store[key] = value
+
+    async def close(self):
+        pass
+
+def make_cache(tmp_path, **kwargs) -> QueryCache:
+    return QueryCache(TenantVersions(str(tmp_path / "tenant_versions.json")), **kwargs)
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_least_recently_used_entry_is_evicted_by_count(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    run(cache.set("a", {"n": 1}))
+    run(cache.set("b", {"n": 2}))
+    assert run(cache.get("a")) == {"n": 1}  # "b" is now the oldest
+
+    run(cache.set("c", {"n": 3}))
+
+    assert run(cache.get("b")) is None
+    assert run(cache.get("a")) == {"n": 1} and run(cache.get("c")) == {"n": 3}
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 2
+
+def test_entries_are_evicted_by_size(tmp_path):
+    payload = {"text": "x" * 100}
+    size = len(query_cache.dumps_json(payload))
+    cache = make_cache(tmp_path, max_bytes=size * 2 + size // 2)
+    for key in ("a", "b", "c"):
+        run(cache.set(key, payload))
+
+    assert run(cache.get("a")) is None
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == size * 2
+
+    run(cache.set("big", {"text": "x" * size * 3}))  # larger than the whole cache: not stored
+    assert run(cache.get("big")) is None
+    assert cache.stats()["bytes"] == size * 2
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    clock = Clock()
+    cache = make_cache(tmp_path, ttl=10, clock=clock)
+    run(cache.set("a", {"n": 1}))
+
+    clock.now = 9.9
+    assert run(cache.get("a")) == {"n": 1}
+    clock.now = 10
+    assert run(cache.get("a")) is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+def test_bumping_a_tenant_changes_only_its_keys(tmp_path):
+    cache = make_cache(tmp_path)
+    params = {"query": "leave", "limit": 5}
+    hr_key, it_key = cache.key("search", "HR", params), cache.key("search", "IT", params)
+    run(cache.set(hr_key, {"n": 1}))
+
+    cache.versions.bump(["HR"])
+    # a second process sees the bump through the shared file
+    other = make_cache(tmp_path)
+
+    assert cache.key("search", "HR", params) != hr_key
+    assert other.key("search", "HR", params) == cache.key("search", "HR", params)
+    assert run(cache.get(cache.key("search", "HR", params))) is None
+    assert cache.key("search", "IT", params) == it_key
+
+def test_shared_backend_fills_the_local_level(tmp_path):
+    backend = FakeBackend()
+    writer, reader = make_cache(tmp_path, backend=backend), make_cache(tmp_path, backend=backend)
+    run(writer.set("a", {"n": 1}))
+
+    assert run(reader.get("a")) == {"n": 1}
+    backend.store.clear()
+    assert run(reader.get("a")) == {"n": 1}
+    assert reader.stats()["shared_hits"] == 1 and reader.stats()["hits"] == 1
+
+def test_failing_backend_falls_back_to_the_process_cache(tmp_path):
+    backend = FakeBackend()
+    backend.error = ConnectionError("redis down")
+    cache = make_cache(tmp_path, backend=backend)
+
+    assert run(cache.get("a")) is None
+    run(cache.set("a", {"n": 1}))
+    assert run(cache.get("a")) == {"n": 1}
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+
+def test_missing_redis_package_caches_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_cache, "QUERY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+
+    cache = query_cache.create_query_cache(TenantVersions(str(tmp_path / "tenant_versions.json")))
+    run(cache.set("a", {"n": 1}))
+
+    assert cache.backend is None and cache.stats()["shared"] is False
+    assert run(cache.get("a")) == {"n": 1}
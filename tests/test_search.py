@@ -0,0 +1,13 @@
+def test_search_collapses_duplicates_onto_their_canonical_and_fills_the_limit(api):
+    test_client, client = api
+    hr = client.tenant("HR")
+    canonical = str(hr.objects[20].uuid)
+    for obj in hr.objects[:3]:
+        obj.properties["canonical_id"] = canonical
+
+    response = test_client.post("/search", json={"query": "leave", "tenant": "HR", "search_type": "keyword", "limit": 4})
+
+    documents = response.json()["documents"]
+    assert [document["id"] for document in documents] == [canonical] + [str(obj.uuid) for obj in hr.objects[3:6]]
+    assert documents[0]["content"] == hr.objects[20].properties["content"]
+    assert documents[0]["score"] == 1.0
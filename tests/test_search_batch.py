@@ -0,0 +1,43 @@
+import time
+
+import app
+
+def search_calls(tenant):
+    return [argument for method, argument in tenant.calls if method == "search"]
+
+def test_batch_runs_unique_searches_once_and_concurrently(api):
+    test_client, client = api
+    hr = client.tenant("HR")
+    hr.latency = 0.1
+    requests = [{"query": f"q{i % 10}", "tenant": "HR", "limit": 2} for i in range(20)]
+
+    start = time.perf_counter()
+    response = test_client.post("/search/batch", json={"requests": requests})
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["result"]["query"] for item in results] == [request["query"] for request in requests]
+    assert all(item["status_code"] == 200 and len(item["result"]["documents"]) == 2 for item in results)
+    assert sorted(search_calls(hr)) == sorted(f"q{i}" for i in range(10))
+    assert elapsed < 0.6  # ten 0.1s searches, run side by side
+
+def test_failed_item_does_not_fail_the_batch(api):
+    test_client, client = api
+    client.tenant("Broken").error = RuntimeError("tenant not found")
+    response = test_client.post("/search/batch", json={"requests": [
+        {"query": "leave", "tenant": "HR"},
+        {"query": "leave", "tenant": "HR", "search_type": "nope"},
+        {"query": "leave", "tenant": "Broken"},
+    ]})
+
+    assert response.status_code == 200
+    ok, invalid, broken = response.json()["results"]
+    assert ok["status_code"] == 200 and "error" not in ok
+    assert invalid == {"error": "Invalid search type", "status_code": 400}
+    assert broken["status_code"] == 500 and "tenant not found" in broken["error"]
+
+def test_batch_size_is_limited(api):
+    test_client, _ = api
+    requests = [{"query": "q", "tenant": "HR"}] * (app.MAX_BATCH_SIZE + 1)
+    assert test_client.post("/search/batch", json={"requests": requests}).status_code == 400
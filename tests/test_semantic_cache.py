@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+
+import semantic_cache
+from embeddings import Embedder
+from semantic_cache import SemanticCache, create_semantic_cache
+from tenant_versions import TenantVersions
+
+class TableEmbedder(Embedder):
+    """Semantic stand-in: fixed vectors per query"""
+
+    model_id = "table"
+    semantic = True
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed(self, texts):
+        return [self.vectors[text] for text in texts]
+
+def test_disabled_without_a_semantic_embedder(monkeypatch, tmp_path):
+    versions = TenantVersions(str(tmp_path / "versions.json"))
+    for name in (None, "hashing"):
+        monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_EMBEDDER", name)
+        cache = create_semantic_cache(versions)
+        assert not cache.enabled
+        vector = asyncio.run(cache.embed("Can employees carry over vacation days?"))
+        assert vector is None
+        cache.set("generative", "HR", vector, "q", {"answer": 1})
+        assert cache.get("generative", "HR", vector) is None
+        assert cache.stats()["enabled"] is False
+
+def test_paraphrase_hits_until_the_tenant_changes(tmp_path):
+    versions = TenantVersions(str(tmp_path / "versions.json"))
+    cache = SemanticCache(TableEmbedder({
+        "How many vacation days do I get?": [1.0, 0.0, 0.0],
+        "How much vacation do I get?": [0.99, 0.1, 0.0],
+        "What is the travel policy?": [0.0, 1.0, 0.0],
+    }), versions, threshold=0.9)
+
+    stored = asyncio.run(cache.embed("How many vacation days do I get?"))
+    cache.set("generative", "HR", stored, "How many vacation days do I get?", {"answer": "25"})
+
+    match = cache.get("generative", "HR", asyncio.run(cache.embed("How much vacation do I get?")))
+    assert match[0] == "How many vacation days do I get?" and match[1] == {"answer": "25"}
+    assert cache.get("generative", "HR", asyncio.run(cache.embed("What is the travel policy?"))) is None
+    assert cache.get("generative", "Finance", stored) is None
+
+    versions.bump(["HR"])
+    assert cache.get("generative", "HR", stored) is None
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_lookups_allocate_nothing(tmp_path):
+    cache = SemanticCache(TableEmbedder({}), TenantVersions(str(tmp_path / "versions.json")))
+    for limit in range(50):
+        assert cache.get(f"generative:{limit}", f"tenant-{limit}", unit(1.0, 0.0)) is None
+    assert cache.stats()["indexes"] == 0 and cache.stats()["misses"] == 50
+
+def test_only_known_tenants_are_stored(tmp_path):
+    cache = SemanticCache(TableEmbedder({}), TenantVersions(str(tmp_path / "versions.json")), tenants=["HR"])
+    cache.set("generative", "made-up", unit(1.0, 0.0), "q", {"answer": 1})
+    cache.set("generative", "HR", unit(1.0, 0.0), "q", {"answer": 2})
+
+    assert cache.get("generative", "made-up", unit(1.0, 0.0)) is None
+    assert cache.get("generative", "HR", unit(1.0, 0.0))[1] == {"answer": 2}
+    assert cache.stats()["indexes"] == 1
+
+def test_least_recently_used_index_is_dropped(tmp_path):
+    cache = SemanticCache(TableEmbedder({}), TenantVersions(str(tmp_path / "versions.json")), max_indexes=2)
+    for tenant in ("HR", "Finance"):
+        cache.set("generative", tenant, unit(1.0, 0.0), "q", {"tenant": tenant})
+    assert cache.get("generative", "HR", unit(1.0, 0.0)) is not None  # Finance is now the oldest
+    cache.set("generative", "Customer-Service", unit(1.0, 0.0), "q", {})
+
+    assert cache.stats()["indexes"] == 2
+    assert cache.get("generative", "Finance", unit(1.0, 0.0)) is None
+    assert cache.get("generative", "HR", unit(1.0, 0.0)) is not None
+
+def test_index_storage_grows_with_its_entries(tmp_path):
+    cache = SemanticCache(TableEmbedder({}), TenantVersions(str(tmp_path / "versions.json")), max_entries=40)
+    for entry in range(semantic_cache.INITIAL_ROWS):
+        cache.set("generative", "HR", unit(1.0, entry), f"q{entry}", {"entry": entry})
+    index = cache._indexes[("generative", "HR")]
+    assert len(index.used) == semantic_cache.INITIAL_ROWS
+
+    cache.set("generative", "HR", unit(1.0, 100.0), "q-grown", {})
+    assert len(index.used) == 2 * semantic_cache.INITIAL_ROWS
+    for entry in range(40):
+        cache.set("generative", "HR", unit(entry, 1.0), f"r{entry}", {})
+    assert len(index.used) == 40 and cache.evictions > 0
+    assert cache.stats()["entries"] == 40
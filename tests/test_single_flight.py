@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app
+from single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_upstream_call():
+    async def scenario():
+        flight = SingleFlight()
+        upstream = []
+
+        async def fetch():
+            upstream.append(1)
+            await asyncio.sleep(0.05)
+            return {"answer": 42}
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+        return flight, upstream, results
+
+    flight, upstream, results = asyncio.run(scenario())
+    assert len(upstream) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 1, "coalesced": 9, "timeouts": 0, "in_flight": 0}
+
+def test_different_keys_and_later_calls_are_not_coalesced():
+    async def scenario():
+        flight = SingleFlight()
+        upstream = []
+
+        async def fetch():
+            upstream.append(1)
+            await asyncio.sleep(0.01)
+            return len(upstream)
+
+        await asyncio.gather(flight.do("a", fetch), flight.do("b", fetch))
+        await flight.do("a", fetch)
+        return upstream
+
+    assert len(asyncio.run(scenario())) == 3
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        return flight, await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    flight, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) and str(result) == "upstream down" for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+def test_waiter_timeout_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+        finished = []
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            finished.append(1)
+            return "done"
+
+        impatient = asyncio.create_task(flight.do("key", slow, timeout=0.01))
+        patient = asyncio.create_task(flight.do("key", slow, timeout=1))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return flight, await patient, finished
+
+    flight, result, finished = asyncio.run(scenario())
+    assert result == "done" and finished == [1]
+    assert flight.timeouts == 1 and flight.calls == 1
+
+def test_concurrent_identical_searches_query_weaviate_once(fake_weaviate):
+    hr = fake_weaviate.tenant("HR")
+    hr.latency = 0.1
+
+    async def scenario():
+        async with app.app.router.lifespan_context(app.app):
+            transport = httpx.ASGITransport(app=app.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(
+                    http.post("/search", json={"query": "leave", "tenant": "HR", "limit": 3}) for _ in range(8)
+                ))
+
+    responses = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.content for response in responses}) == 1
+    assert [method for method, _ in hr.calls if method == "search"] == ["search"]
+    assert app.single_flight.stats()["coalesced"] == 7
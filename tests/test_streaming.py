@@ -0,0 +1,147 @@
+import json
+from types import SimpleNamespace
+
+import app
+
+def parse_events(body: str):
+    """[(event, data)] from a text/event-stream body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+class FakeStreamer:
+    available = True
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.prompts = []
+
+    async def stream(self, prompt: str):
+        self.prompts.append(prompt)
+        for token in self.tokens:
+            yield token
+
+    async def close(self):
+        pass
+
+class FakeAgent:
+    """AsyncQueryAgent stand-in; `outputs` is what stream() yields, `error` makes it raise first"""
+    outputs = []
+    error = None
+
+    def __init__(self, client):
+        self.client = client
+
+    async def stream(self, query, collections):
+        if FakeAgent.error is not None:
+            raise FakeAgent.error
+        for output in FakeAgent.outputs:
+            yield output
+
+    async def run(self, query, collections):
+        return final_response(f"ran: {query}")
+
+def final_response(answer: str):
+    return SimpleNamespace(final_answer=answer, sources=[], searches=[], aggregations=[])
+
+def test_search_stream_sends_sources_tokens_then_done(api, monkeypatch):
+    test_client, _ = api
+    streamer = FakeStreamer(["Employees ", "accrue ", "leave."])
+    monkeypatch.setattr(app, "answer_streamer", streamer)
+
+    response = test_client.post("/search/stream", json={"query": "leave", "tenant": "HR",
+                                                        "search_type": "generative", "limit": 3})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["sources", "token", "token", "token", "done"]
+    assert len(events[0][1]["documents"]) == 3
+    assert "".join(data["delta"] for event, data in events if event == "token") == "Employees accrue leave."
+    assert len(streamer.prompts) == 1
+
+def test_search_stream_without_streamer_sends_the_generated_answer_once(api, monkeypatch):
+    test_client, client = api
+    monkeypatch.setattr(app, "answer_streamer", SimpleNamespace(available=False, close=FakeStreamer([]).close))
+
+    response = test_client.post("/search/stream", json={"query": "leave", "tenant": "HR",
+                                                        "search_type": "generative"})
+
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["sources", "token", "done"]
+    assert events[1][1] == {"delta": "generated answer"}
+    assert ("generate", None) in client.tenant("HR").calls
+
+def test_search_stream_non_generative_has_no_tokens(api):
+    test_client, _ = api
+    response = test_client.post("/search/stream", json={"query": "leave", "tenant": "HR", "search_type": "keyword"})
+    assert [event for event, _ in parse_events(response.text)] == ["sources", "done"]
+
+def test_search_stream_reports_errors_as_an_event(api):
+    test_client, client = api
+    client.tenant("Broken").error = RuntimeError("tenant not found")
+    response = test_client.post("/search/stream", json={"query": "leave", "tenant": "Broken"})
+
+    (event, data), = parse_events(response.text)
+    assert event == "error" and "tenant not found" in data["detail"]
+
+def test_query_agent_stream_forwards_progress_and_tokens(api, monkeypatch):
+    test_client, _ = api
+    monkeypatch.setattr(app, "AsyncQueryAgent", FakeAgent)
+    monkeypatch.setattr(FakeAgent, "outputs", [
+        SimpleNamespace(output_type="progress_message", stage="searching", message="Searching Documents"),
+        SimpleNamespace(output_type="streamed_tokens", delta="Twenty "),
+        SimpleNamespace(output_type="streamed_tokens", delta="days."),
+        final_response("Twenty days."),
+    ])
+
+    response = test_client.post("/query-agent/stream", json={"query": "how much leave?", "tenant": "HR"})
+
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["progress", "token", "token", "result", "done"]
+    assert events[0][1] == {"stage": "searching", "message": "Searching Documents"}
+    assert events[3][1]["answer"] == "Twenty days."
+
+def test_query_agent_stream_falls_back_to_run(api, monkeypatch):
+    test_client, _ = api
+    monkeypatch.setattr(app, "AsyncQueryAgent", FakeAgent)
+    monkeypatch.setattr(FakeAgent, "error", NotImplementedError("no streaming"))
+
+    response = test_client.post("/query-agent/stream", json={"query": "leave", "tenant": "HR"})
+
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["token", "result", "done"]
+    assert events[0][1] == {"delta": "ran: leave"}
+
+def test_query_agent_stream_error_after_output_is_an_event(api, monkeypatch):
+    test_client, _ = api
+
+    class FailingAgent(FakeAgent):
+        async def stream(self, query, collections):
+            yield SimpleNamespace(output_type="progress_message", stage="searching", message="Searching")
+            raise RuntimeError("agent service unavailable")
+
+    monkeypatch.setattr(app, "AsyncQueryAgent", FailingAgent)
+    response = test_client.post("/query-agent/stream", json={"query": "leave", "tenant": "HR"})
+
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["progress", "error"]
+    assert "agent service unavailable" in events[1][1]["detail"]
+
+def test_search_stream_prompt_gets_full_chunks_while_sources_are_shaped(api, monkeypatch):
+    test_client, client = api
+    streamer = FakeStreamer(["ok"])
+    monkeypatch.setattr(app, "answer_streamer", streamer)
+
+    response = test_client.post("/search/stream", json={
+        "query": "paid leave", "tenant": "HR", "search_type": "generative", "limit": 2,
+        "return_properties": ["content"], "max_content_length": 60, "snippets": True,
+    })
+
+    sources = parse_events(response.text)[0][1]["documents"]
+    assert all("<mark>" in document["content"] and "file_name" not in document for document in sources)
+    prompt, = streamer.prompts
+    assert "<mark>" not in prompt
+    for obj in client.tenant("HR").objects[:2]:
+        assert f"{obj.properties['file_name']}: {obj.properties['content']}" in prompt
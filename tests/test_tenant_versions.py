@@ -0,0 +1,99 @@
+import os
+import sys
+
+import tenant_versions
+from tenant_versions import RedisTenantVersions, TenantVersions, create_tenant_versions
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hincrby(self, key, field, amount):
+        self.commands.append((key, field, amount))
+
+    def execute(self):
+        for key, field, amount in self.commands:
+            hash_ = self.client.hashes.setdefault(key, {})
+            hash_[field.encode()] = str(int(hash_.get(field.encode(), b"0")) + amount).encode()
+
+class FakeRedis:
+    """The hash commands RedisTenantVersions uses, returning bytes like redis-py"""
+    def __init__(self):
+        self.hashes = {}
+        self.reads = 0
+        self.error = None
+
+    def hgetall(self, key):
+        self.reads += 1
+        if self.error:
+            raise self.error
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_redis_versions_are_shared_between_processes():
+    client, clock = FakeRedis(), Clock()
+    ingest, api = RedisTenantVersions(client, clock=clock), RedisTenantVersions(client, refresh=1.0, clock=clock)
+    assert api.get("HR") == 0
+
+    ingest.bump(["HR", "IT"])
+    ingest.bump(["HR"])
+
+    assert ingest.all() == {"HR": 2, "IT": 1}
+    assert api.get("HR") == 0  # cached until the refresh interval passes
+    clock.now = 1.0
+    assert api.get("HR") == 2 and api.get("IT") == 1
+
+def test_redis_reads_are_cached_for_the_refresh_interval():
+    client, clock = FakeRedis(), Clock()
+    versions = RedisTenantVersions(client, refresh=1.0, clock=clock)
+    for _ in range(5):
+        versions.get("HR")
+    assert client.reads == 1
+
+def test_unreachable_redis_keeps_the_last_versions():
+    client, clock = FakeRedis(), Clock()
+    versions = RedisTenantVersions(client, refresh=1.0, clock=clock)
+    versions.bump(["HR"])
+    assert versions.get("HR") == 1
+
+    client.error = ConnectionError("redis down")
+    clock.now = 5.0
+    assert versions.get("HR") == 1
+
+def test_file_versions_are_used_without_redis(tmp_path, monkeypatch):
+    monkeypatch.delenv("QUERY_CACHE_REDIS_URL", raising=False)
+    path = tmp_path / "versions.json"
+    monkeypatch.setenv("TENANT_VERSIONS_PATH", str(path))
+
+    versions = create_tenant_versions()
+
+    assert isinstance(versions, TenantVersions) and versions.path == str(path)
+
+def test_missing_redis_package_falls_back_to_the_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("QUERY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setitem(sys.modules, "redis", None)
+
+    versions = create_tenant_versions(str(tmp_path / "versions.json"))
+
+    assert isinstance(versions, TenantVersions)
+
+def test_default_path_does_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("QUERY_CACHE_REDIS_URL", raising=False)
+    monkeypatch.delenv("TENANT_VERSIONS_PATH", raising=False)
+    monkeypatch.chdir(tmp_path)
+
+    versions = create_tenant_versions()
+
+    assert os.path.isabs(versions.path)
+    assert versions.path == tenant_versions.DEFAULT_TENANT_VERSIONS_PATH
+    assert os.path.isabs(tenant_versions.TENANT_VERSIONS_PATH)
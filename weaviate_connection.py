@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+import weaviate
+from weaviate.auth import AuthApiKey
+from weaviate.classes.init import AdditionalConfig, Timeout
+from weaviate.config import ConnectionConfig
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WEAVIATE_URL = os.getenv('WCD_URL')
+WEAVIATE_API_KEY = os.getenv('WCD_API_KEY')
+ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_APIKEY')
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+HEALTH_CHECK_INTERVAL = 30  # seconds between readiness pings
+HTTP_POOL_CONNECTIONS = 20
+HTTP_POOL_MAXSIZE = 100
+
+def get_inference_headers() -> Dict[str, str]:
+    headers = {}
+    if OPENAI_API_KEY:
+        headers["X-INFERENCE-PROVIDER-API-KEY"] = OPENAI_API_KEY
+    elif ANTHROPIC_API_KEY:
+        headers["X-INFERENCE-PROVIDER-API-KEY"] = ANTHROPIC_API_KEY
+
+    if ANTHROPIC_API_KEY:
+        headers["X-Anthropic-Api-Key"] = ANTHROPIC_API_KEY
+    if OPENAI_API_KEY:
+        headers["X-OpenAI-Api-Key"] = OPENAI_API_KEY
+    return headers
+
+def create_async_client():
+    """Async client with a pooled HTTP session; gRPC multiplexes queries over one channel"""
+    return weaviate.use_async_with_weaviate_cloud(
+        cluster_url=WEAVIATE_URL,
+        auth_credentials=AuthApiKey(WEAVIATE_API_KEY),
+        headers=get_inference_headers(),
+        additional_config=AdditionalConfig(
+            connection=ConnectionConfig(
+                session_pool_connections=HTTP_POOL_CONNECTIONS,
+                session_pool_maxsize=HTTP_POOL_MAXSIZE,
+            ),
+            timeout=Timeout(init=10, query=60, insert=120),
+        ),
+    )
+
+class WeaviateConnection:
+    """One long-lived async client per worker process.
+
+    Opened lazily by the first get() so worker startup does no network I/O,
+    pinged in the background every HEALTH_CHECK_INTERVAL seconds, replaced
+    when it stops answering, and closed at shutdown. Requests call get() and
+    share the same connections.
+    """
+
+    def __init__(self, client_factory=create_async_client, health_check_interval: float = HEALTH_CHECK_INTERVAL):
+        self.client_factory = client_factory
+        self.health_check_interval = health_check_interval
+        self._client = None
+        self._lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def get(self):
+        """The shared client, reconnecting first if it has dropped"""
+        client = self._client
+        if client is not None and client.is_connected():
+            return client
+        async with self._lock:
+            if self._client is None or not self._client.is_connected():
+                await self._reconnect()
+            return self._client
+
+    async def _reconnect(self):
+        old_client, self._client = self._client, None
+        if old_client is not None:
+            try:
+                await old_client.close()
+            except Exception as e:
+                logger.warning(f"Error closing dropped Weaviate client: {e}")
+        client = self.client_factory()
+        await client.connect()
+        self._client = client
+        logger.info("Weaviate client connected")
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            if self._client is None:
+                continue  # nothing opened yet; get() connects on demand
+            try:
+                healthy = await self._client.is_ready()
+            except Exception as e:
+                logger.warning(f"Weaviate health check failed: {e}")
+                healthy = False
+            if not healthy:
+                async with self._lock:
+                    try:
+                        await self._reconnect()
+                    except Exception as e:
+                        logger.error(f"Weaviate reconnect failed: {e}")
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None